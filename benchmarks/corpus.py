@@ -0,0 +1,115 @@
+"""
+Synthetic resume and job-description corpora for benchmarks.
+
+Resumes carry realistic PII (names, emails, phones, addresses, profile links) so the
+redaction stage does real work. Sizes scale the number of roles and projects:
+small ~250 tokens, medium ~700, large ~1800. Output is deterministic for a seed.
+"""
+import random
+from pathlib import Path
+
+SIZES = {"small": (1, 1), "medium": (3, 3), "large": (8, 6)}  # (roles, projects)
+
+_FIRST = ["Amelia", "Kasun", "Priya", "Liam", "Sofia", "Noah", "Ishara", "Mateo", "Chloe", "Ravi", "Hana", "Owen"]
+_LAST = ["Perera", "Nguyen", "Smith", "Fernando", "Garcia", "Kowalski", "Silva", "Tanaka", "Brown", "Okafor"]
+_CITIES = ["Colombo", "Sydney", "Austin", "Toronto", "Berlin", "Singapore"]
+_STREETS = ["Galle Road", "George Street", "Congress Avenue", "King Street", "Torstrasse"]
+_COMPANIES = ["Acme Analytics", "Northwind Systems", "Blue Harbor Labs", "Quantum Retail", "Helios Health", "Vertex Logistics"]
+_TITLES = ["Software Engineer", "Data Engineer", "Machine Learning Engineer", "Backend Developer", "Platform Engineer"]
+_SKILLS = [
+    "Python", "SQL", "Spark", "Kubernetes", "Docker", "AWS", "GCP", "Terraform", "PyTorch", "scikit-learn",
+    "FastAPI", "PostgreSQL", "Kafka", "Airflow", "React", "TypeScript", "Go", "Redis", "MLflow", "dbt",
+]
+_VERBS = ["Designed", "Built", "Led", "Migrated", "Optimised", "Automated", "Scaled", "Maintained"]
+_OBJECTS = [
+    "a streaming ingestion pipeline processing 2M events per hour",
+    "the customer analytics warehouse on PostgreSQL and dbt",
+    "a model-serving platform with canary deployments",
+    "CI/CD for 40 microservices with Terraform-managed infrastructure",
+    "a recommendation service that lifted conversion by 7%",
+    "batch ETL jobs from cron to Airflow with data-quality checks",
+    "an internal feature store used by four product teams",
+    "observability dashboards and on-call runbooks",
+]
+
+
+def _bullets(rng: random.Random, count: int) -> str:
+    return "\n".join(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {', '.join(rng.sample(_SKILLS, 2))}." for _ in range(count))
+
+
+def make_resume(rng: random.Random, size: str = "medium") -> str:
+    roles, projects = SIZES[size]
+    first, last = rng.choice(_FIRST), rng.choice(_LAST)
+    city = rng.choice(_CITIES)
+    lines = [
+        f"{first} {last}",
+        f"{rng.randint(1, 250)} {rng.choice(_STREETS)}, {city}",
+        f"{first.lower()}.{last.lower()}@example.com | +1 {rng.randint(200, 999)} {rng.randint(200, 999)} {rng.randint(1000, 9999)}",
+        f"linkedin.com/in/{first.lower()}-{last.lower()}-{rng.randint(10, 99)} | github.com/{first.lower()}{last.lower()}",
+        "",
+        "Summary",
+        f"{rng.choice(_TITLES)} with {rng.randint(2, 15)} years of experience building data and backend systems.",
+        "",
+        "Skills",
+        ", ".join(rng.sample(_SKILLS, 8)),
+        "",
+        "Experience",
+    ]
+    year = 2024
+    for _ in range(roles):
+        start = year - rng.randint(1, 4)
+        lines += [f"{rng.choice(_TITLES)} - {rng.choice(_COMPANIES)}, {rng.choice(_CITIES)} ({start}-{year})", _bullets(rng, 4), ""]
+        year = start
+    lines.append("Projects")
+    for index in range(projects):
+        lines += [f"Project {index + 1}: {rng.choice(_OBJECTS).capitalize()}", _bullets(rng, 2), ""]
+    lines += [
+        "Education",
+        f"B.Sc. in Computer Science, University of {rng.choice(_CITIES)} ({year - 4}-{year})",
+        "",
+        f"References available on request from {rng.choice(_FIRST)} {rng.choice(_LAST)}.",
+    ]
+    return "\n".join(lines)
+
+
+def make_job_description(rng: random.Random) -> str:
+    title = rng.choice(_TITLES)
+    required = rng.sample(_SKILLS, 6)
+    return "\n".join([
+        f"{title} - {rng.choice(_COMPANIES)}",
+        "",
+        f"We are hiring a {title.lower()} to join our platform team.",
+        "",
+        "Responsibilities",
+        _bullets(rng, 5),
+        "",
+        "Requirements",
+        *(f"- {rng.randint(2, 5)}+ years with {skill}" for skill in required),
+        "- Bachelor's degree in Computer Science or equivalent experience",
+        "- Clear written communication and ownership of production systems",
+    ])
+
+
+def write_corpus(
+    directory: Path,
+    resumes: int,
+    positions: int,
+    sizes: list[str],
+    seed: int = 0,
+) -> tuple[list[Path], list[Path]]:
+    """Write resumes (cycling through `sizes`) and job descriptions as .txt files."""
+    rng = random.Random(seed)
+    resume_dir, jd_dir = directory / "resumes", directory / "positions"
+    resume_dir.mkdir(parents=True, exist_ok=True)
+    jd_dir.mkdir(parents=True, exist_ok=True)
+    resume_paths, jd_paths = [], []
+    for index in range(resumes):
+        size = sizes[index % len(sizes)]
+        path = resume_dir / f"resume_{index:04d}_{size}.txt"
+        path.write_text(make_resume(rng, size), encoding="utf-8")
+        resume_paths.append(path)
+    for index in range(positions):
+        path = jd_dir / f"position_{index:02d}.txt"
+        path.write_text(make_job_description(rng), encoding="utf-8")
+        jd_paths.append(path)
+    return resume_paths, jd_paths
@@ -0,0 +1,245 @@
+"""
+Offline end-to-end benchmark.
+
+Starts the fake OpenAI server (benchmarks/fake_openai.py), writes a synthetic corpus
+and drives the real code paths against it:
+  redaction_run      every resume once
+  resume_evaluator   every resume x position pair (redaction + evaluation), with the
+                     time spent in redaction and in evaluation reported separately
+
+Result caches are disabled so every call reaches the fake server (with JD_DIGEST=1
+each job description is still digested only once per process). The report is JSON
+with sorted keys (throughput, p50/p95/p99 latency per stage, scheduler retries,
+injected errors, token usage) so two runs can be diffed directly:
+
+    python benchmarks/e2e.py --resumes 40 --positions 2 --concurrency 8 -o before.json
+    python benchmarks/e2e.py --resumes 40 --positions 2 --concurrency 8 -o after.json
+    diff before.json after.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import warnings
+import threading
+import contextlib
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import SIZES, write_corpus  # noqa: E402
+from benchmarks.fake_openai import FakeOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+
+REPORT_VERSION = 1
+
+# langchain's include_raw output trips a harmless pydantic serializer warning per call.
+warnings.filterwarnings("ignore", message="Pydantic serializer warnings", category=UserWarning)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies_s: list[float], errors: int = 0, wall_s: Optional[float] = None) -> dict[str, Any]:
+    """Latency percentiles, plus throughput when the stage's wall time is given."""
+    values = sorted(latency * 1000 for latency in latencies_s)
+    calls = len(values)
+    summary: dict[str, Any] = {"calls": calls, "errors": errors}
+    if wall_s is not None:
+        summary["wall_s"] = round(wall_s, 3)
+        summary["throughput_per_s"] = round((calls - errors) / wall_s, 3) if wall_s > 0 else 0.0
+    summary["latency_ms"] = {
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+        "mean": round(sum(values) / calls, 1) if calls else 0.0,
+        "max": round(values[-1], 1) if values else 0.0,
+    }
+    return summary
+
+
+def _run_stage(jobs: list[Any], fn: Callable[[Any], bool], concurrency: int) -> tuple[list[float], int, float]:
+    """Run fn over jobs on a thread pool; returns per-call latencies, error count and wall time."""
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def _timed(job: Any) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = fn(job)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(_timed, jobs))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _diff(after: dict[str, int], before: dict[str, int]) -> dict[str, int]:
+    return {key: after[key] - before.get(key, 0) for key in sorted(after)}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _configure_environment(base_url: str, log_file: Path, args: argparse.Namespace) -> None:
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": os.getenv("BENCH_API_KEY", "sk-benchmark"),
+        "REDACTION_CACHE": "0",
+        "EVALUATION_CACHE": "0",
+        "JD_DIGEST_CACHE": "0",
+        "LOG_LEVEL": args.log_level,
+        "LOG_FILE": str(log_file),
+    })
+    os.environ.setdefault("OPENAI_MAX_CONCURRENCY", str(args.concurrency * 2))
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    server = FakeOpenAIServer(config=config_from_args(args)).start()
+    workdir = Path(tempfile.mkdtemp(prefix="resume-bench-"))
+    try:
+        _configure_environment(server.base_url, workdir / "bench.log", args)
+        resumes, positions = write_corpus(workdir, args.resumes, args.positions, args.sizes, seed=args.corpus_seed)
+
+        # Imported after the environment is set: module-level settings are read at import.
+        import main
+        import modules.redactor as redactor
+        from modules.llm import usage_totals
+        from modules.ratelimit import get_scheduler
+
+        scheduler = get_scheduler()
+        stages: dict[str, Any] = {}
+        retries: dict[str, Any] = {}
+        fake: dict[str, Any] = {}
+
+        def _snapshot() -> tuple[dict, dict]:
+            return dict(scheduler.stats), {k: v for k, v in server.stats.as_dict().items() if k != "by_kind"}
+
+        if args.stage in ("all", "redaction"):
+            sched_before, fake_before = _snapshot()
+            latencies, errors, wall = _run_stage(resumes, lambda path: bool(redactor.redaction_run(path)), args.concurrency)
+            stages["redaction_run"] = summarize(latencies, errors, wall)
+            sched_after, fake_after = _snapshot()
+            retries["redaction_run"] = _diff(sched_after, sched_before)
+            fake["redaction_run"] = _diff(fake_after, fake_before)
+
+        if args.stage in ("all", "evaluation"):
+            # resume_evaluator imports redaction_run at call time, so timing it here splits
+            # each end-to-end call into its redaction and evaluation parts.
+            local = threading.local()
+            original = redactor.redaction_run
+            redact_times: list[float] = []
+            evaluate_times: list[float] = []
+            lock = threading.Lock()
+
+            def _timed_redaction(resume_path):
+                start = time.perf_counter()
+                try:
+                    return original(resume_path)
+                finally:
+                    local.redaction_s = time.perf_counter() - start
+
+            def _evaluate(pair) -> bool:
+                local.redaction_s = 0.0
+                start = time.perf_counter()
+                ok = main.resume_evaluator(*pair) is not None
+                total = time.perf_counter() - start
+                with lock:
+                    redact_times.append(local.redaction_s)
+                    evaluate_times.append(total - local.redaction_s)
+                return ok
+
+            pairs = [(resume, position) for position in positions for resume in resumes]
+            sched_before, fake_before = _snapshot()
+            redactor.redaction_run = _timed_redaction
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    latencies, errors, wall = _run_stage(pairs, _evaluate, args.concurrency)
+            finally:
+                redactor.redaction_run = original
+            stages["resume_evaluator"] = summarize(latencies, errors, wall)
+            stages["resume_evaluator.redaction"] = summarize(redact_times)
+            stages["resume_evaluator.evaluation"] = summarize(evaluate_times)
+            sched_after, fake_after = _snapshot()
+            retries["resume_evaluator"] = _diff(sched_after, sched_before)
+            fake["resume_evaluator"] = _diff(fake_after, fake_before)
+
+        return {
+            "report_version": REPORT_VERSION,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "config": {
+                "resumes": args.resumes,
+                "positions": args.positions,
+                "sizes": args.sizes,
+                "concurrency": args.concurrency,
+                "fake_server": vars(server.config),
+                "environment": {
+                    name: os.environ[name]
+                    for name in sorted(os.environ)
+                    if name.startswith(("REDACTION_", "EVALUATION_", "JD_", "PROMPT_", "PACK_", "OPENAI_MAX", "OPENAI_RPM", "OPENAI_TPM", "LLM_"))
+                },
+            },
+            "stages": stages,
+            "retries": retries,
+            "fake_server": fake,
+            "responses_by_kind": server.stats.by_kind,
+            "usage": usage_totals(),
+        }
+    finally:
+        server.stop()
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against a fake OpenAI server.")
+    parser.add_argument("--resumes", type=int, default=20, help="Number of synthetic resumes.")
+    parser.add_argument("--positions", type=int, default=2, help="Number of synthetic job descriptions.")
+    parser.add_argument(
+        "--sizes", type=lambda value: value.split(","), default=["small", "medium", "large"],
+        help=f"Comma-separated resume sizes to cycle through ({', '.join(SIZES)}).",
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent calls per stage.")
+    parser.add_argument("--stage", choices=["all", "redaction", "evaluation"], default="all")
+    parser.add_argument("--corpus-seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL for the code under test.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout.")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+    unknown = set(args.sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    arguments = _parse_args()
+    report = json.dumps(run(arguments), indent=2, sort_keys=True)
+    if arguments.output:
+        Path(arguments.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
@@ -0,0 +1,325 @@
+"""
+Local stand-in for the OpenAI chat-completions endpoint, for offline benchmarks.
+
+Point the client at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1. Responses are
+shaped by the request:
+  response_format json_schema   content is a JSON instance generated from the schema
+  forced tool call              a tool call whose arguments are generated from its parameters
+  otherwise                     the last user message echoed back (redaction rewrite)
+
+Packed requests ("### Candidate <id>" headers) get one array entry per candidate id.
+Latency is a log-normal base delay plus a per-token cost; 429 and 5xx responses are
+injected at configurable rates. Usage reports cached prompt tokens when a request
+repeats a system message of 1024+ tokens, like the provider's prompt cache.
+
+Run standalone with `python benchmarks/fake_openai.py --port 8089`.
+"""
+import re
+import json
+import time
+import math
+import random
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+_CANDIDATE_RE = re.compile(r"^### Candidate (\S+)\s*$", re.MULTILINE)
+_PROMPT_CACHE_MIN_TOKENS = 1024
+_PROMPT_CACHE_BLOCK = 128
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 200.0           # median base latency per request
+    latency_sigma: float = 0.25         # log-normal spread of the base latency (0 = fixed)
+    prompt_token_ms: float = 0.02       # added per prompt token
+    completion_token_ms: float = 5.0    # added per completion token
+    rate_429: float = 0.0               # probability of a 429 response
+    rate_5xx: float = 0.0               # probability of a 500/503 response
+    retry_after_ms: int = 200           # retry-after-ms sent with injected 429s
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeStats:
+    requests: int = 0
+    completed: int = 0
+    injected_429: int = 0
+    injected_5xx: int = 0
+    by_kind: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "injected_429": self.injected_429,
+            "injected_5xx": self.injected_5xx,
+            "by_kind": dict(sorted(self.by_kind.items())),
+        }
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (characters / 4); the fake does not need exact counts."""
+    return (len(text) + 3) // 4
+
+
+# ---------- Schema instances ----------
+def _resolve(schema: dict, root: dict) -> dict:
+    while "$ref" in schema:
+        node: Any = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            node = node[part]
+        schema = node
+    return schema
+
+
+def schema_instance(schema: dict, rng: random.Random, candidate_ids: list[str], root: Optional[dict] = None) -> Any:
+    """Generate a value that validates against a (pydantic-generated) JSON schema."""
+    root = root or schema
+    schema = _resolve(schema, root)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [_resolve(option, root) for option in schema[combinator]]
+            non_null = [option for option in options if option.get("type") != "null"]
+            return schema_instance((non_null or options)[0], rng, candidate_ids, root)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        value = {}
+        for name, prop in schema.get("properties", {}).items():
+            if name == "candidate_id" and candidate_ids:
+                continue
+            value[name] = schema_instance(prop, rng, candidate_ids, root)
+        return value
+    if kind == "array":
+        items = _resolve(schema.get("items", {}), root)
+        if "candidate_id" in items.get("properties", {}) and candidate_ids:
+            return [
+                {"candidate_id": cid, **schema_instance(items, rng, candidate_ids, root)}
+                for cid in candidate_ids
+            ]
+        return [schema_instance(items, rng, candidate_ids, root) for _ in range(schema.get("minItems", 0))]
+    if kind in ("number", "integer"):
+        low = schema.get("minimum", 0)
+        high = schema.get("maximum", max(low, 100))
+        return rng.randint(math.ceil(low), math.floor(high)) if kind == "integer" else round(rng.uniform(low, high), 1)
+    if kind == "boolean":
+        # Validity flags (e.g. JobDigest.is_valid_job_description) hold for the synthetic corpus.
+        return True
+    if kind == "null":
+        return None
+    return "Synthetic benchmark output; the candidate partially matches the role."
+
+
+# ---------- Server ----------
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering POST /v1/chat/completions."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[FakeConfig] = None) -> None:
+        super().__init__((host, port), _Handler)
+        self.config = config or FakeConfig()
+        self.stats = FakeStats()
+        self.rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._seen_prefixes: set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    # Called from handler threads.
+    def _draw(self) -> tuple[float, float]:
+        with self._lock:
+            return self.rng.random(), self.rng.gauss(0, 1)
+
+    def _cached_tokens(self, messages: list[dict]) -> int:
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        prefix = str(messages[0].get("content", ""))
+        tokens = count_tokens(prefix)
+        if tokens < _PROMPT_CACHE_MIN_TOKENS:
+            return 0
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            hit = digest in self._seen_prefixes
+            self._seen_prefixes.add(digest)
+        return tokens // _PROMPT_CACHE_BLOCK * _PROMPT_CACHE_BLOCK if hit else 0
+
+    def _count(self, name: str, kind: Optional[str] = None) -> None:
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+            if kind:
+                self.stats.by_kind[kind] = self.stats.by_kind.get(kind, 0) + 1
+
+    def complete(self, request: dict) -> tuple[int, dict, dict[str, str]]:
+        """Build the (status, body, headers) answer for one chat-completions request."""
+        config = self.config
+        self._count("requests")
+        roll, spread = self._draw()
+        base_delay = config.latency_ms * math.exp(config.latency_sigma * spread) / 1000
+
+        if roll < config.rate_429:
+            self._count("injected_429")
+            time.sleep(base_delay / 4)
+            return 429, _error("Rate limit reached (injected).", "rate_limit_exceeded"), {
+                "retry-after-ms": str(config.retry_after_ms),
+                "x-ratelimit-remaining-requests": "0",
+            }
+        if roll < config.rate_429 + config.rate_5xx:
+            self._count("injected_5xx")
+            time.sleep(base_delay)
+            status = 500 if roll < config.rate_429 + config.rate_5xx / 2 else 503
+            return status, _error("Server error (injected).", "server_error"), {}
+
+        messages = request.get("messages", [])
+        text = "\n".join(str(m.get("content") or "") for m in messages)
+        user_text = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        candidate_ids = _CANDIDATE_RE.findall(user_text)
+
+        message: dict[str, Any] = {"role": "assistant", "content": None, "refusal": None}
+        response_format = request.get("response_format") or {}
+        tool_choice = request.get("tool_choice")
+        if response_format.get("type") == "json_schema":
+            kind = "json_schema"
+            schema = response_format["json_schema"]["schema"]
+            message["content"] = json.dumps(schema_instance(schema, rng, candidate_ids))
+        elif request.get("tools") and isinstance(tool_choice, dict):
+            kind = "tool_call"
+            name = tool_choice["function"]["name"]
+            tool = next(t for t in request["tools"] if t["function"]["name"] == name)
+            arguments = schema_instance(tool["function"].get("parameters", {}), rng, candidate_ids)
+            message["tool_calls"] = [{
+                "id": f"call_{seed:08x}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }]
+        else:
+            kind = "text"
+            message["content"] = user_text
+
+        prompt_tokens = count_tokens(text)
+        completion_tokens = count_tokens(message["content"] or json.dumps(message.get("tool_calls")))
+        time.sleep(
+            base_delay
+            + prompt_tokens * config.prompt_token_ms / 1000
+            + completion_tokens * config.completion_token_ms / 1000
+        )
+        self._count("completed", kind)
+        body = {
+            "id": f"chatcmpl-fake-{seed:08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if kind == "tool_call" else "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self._cached_tokens(messages)},
+            },
+        }
+        return 200, body, {}
+
+
+def _error(message: str, code: str) -> dict:
+    return {"error": {"message": message, "type": code, "code": code, "param": None}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOpenAIServer
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send(404, _error(f"No route for {self.path}.", "not_found"), {})
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._send(400, _error("Body must be valid JSON.", "invalid_request_error"), {})
+            return
+        self._send(*self.server.complete(request))
+
+    def _send(self, status: int, payload: dict, headers: dict[str, str]) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the FakeConfig options on an argument parser."""
+    defaults = FakeConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Median base latency per request.")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma, help="Log-normal spread of the base latency (0 = fixed).")
+    parser.add_argument("--prompt-token-ms", type=float, default=defaults.prompt_token_ms, help="Delay per prompt token.")
+    parser.add_argument("--completion-token-ms", type=float, default=defaults.completion_token_ms, help="Delay per completion token.")
+    parser.add_argument("--rate-429", type=float, default=defaults.rate_429, help="Probability of an injected 429.")
+    parser.add_argument("--rate-5xx", type=float, default=defaults.rate_5xx, help="Probability of an injected 500/503.")
+    parser.add_argument("--retry-after-ms", type=int, default=defaults.retry_after_ms, help="retry-after-ms sent with 429s.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and error injection.")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        prompt_token_ms=args.prompt_token_ms,
+        completion_token_ms=args.completion_token_ms,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after_ms=args.retry_after_ms,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.host, args.port, config_from_args(args))
+    print(f"Serving on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats.as_dict()))
@@ -0,0 +1,97 @@
+"""
+Import-time budget check for the CLI.
+
+Runs each probe in a fresh interpreter, takes the best of several runs and fails
+(exit code 1) when startup exceeds the budget or a heavy dependency is imported
+eagerly. Run from the repository root:
+
+    python benchmarks/import_time.py
+
+Environment:
+  IMPORT_BUDGET_MS   allowed wall time for `import main` (default 150)
+  IMPORT_RUNS        runs per probe, best one counts (default 5)
+"""
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only be loaded when an LLM call, a prompt or scoring is needed.
+HEAVY_MODULES = (
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "openai",
+    "httpx",
+    "pydantic",
+    "tiktoken",
+    "numpy",
+    "dotenv",
+    "modules.prompts",
+    "modules.llm",
+    "modules.ratelimit",
+)
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{body}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+PROBES = {
+    "import main": "import main",
+    "import modules.redactor + pre_redact": (
+        "from modules.redactor import pre_redact\n"
+        "pre_redact('Jane Doe, jane@example.com, +1 415 555 0100')"
+    ),
+    "--help": (
+        "import main\n"
+        "sys.argv = ['main.py', '--help']\n"
+        "try:\n"
+        "    main._parse_args()\n"
+        "except SystemExit:\n"
+        "    pass"
+    ),
+}
+
+
+def _run_probe(body: str) -> dict:
+    code = _PROBE.format(body=body, heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    budget_ms = float(os.getenv("IMPORT_BUDGET_MS", "150"))
+    runs = max(1, int(os.getenv("IMPORT_RUNS", "5")))
+    failures = 0
+
+    for name, body in PROBES.items():
+        results = [_run_probe(body) for _ in range(runs)]
+        best = min(result["ms"] for result in results)
+        loaded = sorted({module for result in results for module in result["loaded"]})
+        problems = []
+        if name == "import main" and best > budget_ms:
+            problems.append(f"{best:.1f} ms exceeds budget of {budget_ms:.0f} ms")
+        if loaded:
+            problems.append(f"eagerly imported: {', '.join(loaded)}")
+        status = "FAIL" if problems else "ok"
+        print(f"{status:4}  {name:40} {best:7.1f} ms  {'; '.join(problems)}")
+        failures += bool(problems)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,34 @@
+from __future__ import annotations
+
 import os
+import re
 import sys
+import json
+import time
+import asyncio
 import logging
 import argparse
 from pathlib import Path
-from typing import Optional
-
-from modules.prompts import EvaluationOutput, resume_eveluator_prompt
-from modules.redactor import redaction_run
-from langchain_openai import ChatOpenAI
-from tenacity import retry, wait_random_exponential, stop_after_attempt
+from typing import TYPE_CHECKING, Optional, TextIO
 
+from modules import metrics
+from modules.cache import cache_from_env, cache_key
+from modules.common import is_disabled
+from modules.jd_digest import InvalidJobDescription, aprepare_job_description, jd_digest_enabled, prepare_job_description
+from modules.logsetup import setup_logging
 
-# ---------- Logging setup ----------
-_VALID_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
-_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
-if _LOG_LEVEL not in _VALID_LEVELS:
-    _LOG_LEVEL = "INFO"
-_LOG_FILE = Path(os.getenv("LOG_FILE", "logs/resume_assesor.log"))
-
-
-def _ensure_log_dir(log_file: Path) -> None:
-    try:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
-
+# langchain, openai, pydantic and tiktoken take over a second to import, so they are
+# imported inside the functions that make LLM calls; `--help` and argument errors stay fast.
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from modules.prompts import CandidateEvaluation, EvaluationOutput
+    from modules.results import ResultsStore
 
-def _setup_logger() -> logging.Logger:
-    logger = logging.getLogger("resume_assesor")
-    logger.setLevel(_LOG_LEVEL)
-    logger.propagate = False
-
-    if logger.handlers:
-        return logger
-
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    try:
-        _ensure_log_dir(_LOG_FILE)
-        file_handler = logging.FileHandler(_LOG_FILE)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    except Exception:
-        logger.warning("File logging disabled due to initialization error.", exc_info=True)
 
-    return logger
-
-
-assr_logger = _setup_logger()
+# ---------- Logging setup ----------
+# Configured in _main (or on first import of the redactor), not at import time: the
+# spawn-based extraction pool re-imports this module in every worker process.
+assr_logger = logging.getLogger("resume_assesor")
 
 
 # ---------- Helpers ----------
@@ -68,7 +42,14 @@ def _validate_file_readable(path: Path, description: str) -> None:
 
 
 def _read_text_file(path: Path, description: str) -> str:
+    from modules.ingest import DOCUMENT_EXTENSIONS, read_document
+
     _validate_file_readable(path, description)
+    if path.suffix.lower() in DOCUMENT_EXTENSIONS:
+        try:
+            return read_document(path)
+        except Exception as e:
+            raise IOError(f"Failed to read {description}: {path} ({e})") from e
     try:
         return path.read_text(encoding="utf-8")
     except Exception as e:
@@ -83,14 +64,16 @@ def _get_model_name() -> str:
 
 
 # ---------- LLM ----------
-@retry(wait=wait_random_exponential(min=1, max=10), stop=stop_after_attempt(3))
 def invoke_llm() -> ChatOpenAI:
     """
-    Initialize the OpenAI chat model with sane defaults, retrying on transient errors.
+    Return the shared OpenAI chat model with sane defaults. Requests made with it go
+    through the rate-limit scheduler, which owns retries, so client retries are off.
     """
+    from modules.llm import get_chat_model
+
     model_name = _get_model_name()
     try:
-        llm = ChatOpenAI(model=model_name, temperature=0, top_p=1)
+        llm = get_chat_model(model=model_name, temperature=0, top_p=1, max_retries=0)
         return llm
     except Exception as e:
         assr_logger.critical(f"Failed to initialize ChatOpenAI: {e}")
@@ -98,54 +81,868 @@ def invoke_llm() -> ChatOpenAI:
 
 
 # ---------- Core ----------
-def resume_evaluator(resume_path: str | Path, job_description: str | Path) -> Optional[EvaluationOutput]:
+def _evaluator_prompt():
+    """The evaluator prompt for the job description form in use (raw posting or digest)."""
+    from modules.prompts import resume_eveluator_prompt
+
+    return resume_eveluator_prompt(jd_digest=jd_digest_enabled())
+
+
+def _build_evaluation_chain():
+    from modules.prompts import ModelEvaluationOutput
+
+    llm = invoke_llm()
+    prompt = _evaluator_prompt()
+    structured_model = llm.with_structured_output(ModelEvaluationOutput, include_raw=True)
+    return prompt | structured_model
+
+
+# Expected completion size per evaluated candidate, for the rate-limit token estimate.
+_EVALUATION_COMPLETION_TOKENS = 300
+
+
+def _evaluation_tokens(prompt, inputs: dict, candidates: int = 1) -> int:
+    from modules.ratelimit import estimate_tokens
+
+    messages = prompt.format_messages(**inputs)
+    return estimate_tokens(messages, _EVALUATION_COMPLETION_TOKENS * candidates, _get_model_name())
+
+
+def _record_evaluation_usage(raw) -> None:
+    from modules.llm import record_usage, usage_from_message
+
+    usage = usage_from_message(raw)
+    record_usage("evaluation", usage)
+    assr_logger.info(
+        f"Evaluation tokens: prompt={usage['prompt_tokens']} (cached={usage['cached_tokens']}), "
+        f"completion={usage['completion_tokens']}."
+    )
+
+
+def _parse_evaluation(output: dict) -> EvaluationOutput:
     """
-    Redact the resume, evaluate against the job description using an LLM,
-    and print the structured JSON result. Returns the EvaluationOutput on success.
+    Unpack an include_raw structured output: record token usage, including prompt
+    tokens served from the provider's cache, and return the evaluation with its
+    rollups computed locally.
     """
-    resume_path = Path(resume_path)
-    job_description = Path(job_description)
+    _record_evaluation_usage(output.get("raw"))
+    with metrics.span("validation"):
+        if output.get("parsing_error") is not None or output.get("parsed") is None:
+            raise RuntimeError(f"LLM output failed schema validation: {output.get('parsing_error')}")
+        return output["parsed"].to_output()
 
-    try:
-        _validate_file_readable(resume_path, "Resume file")
-        _validate_file_readable(job_description, "Job description file")
-    except Exception as e:
-        assr_logger.error(str(e))
-        return None
 
+def _cached_evaluation(redacted_resume: str, jd: str, packed: bool = False) -> tuple[Optional[EvaluationOutput], Optional[str]]:
+    """
+    Look up a stored evaluation keyed on the redacted resume, the job description,
+    the model and the version of the prompt that produced it: the packed evaluator
+    prompt when `packed`, otherwise the single-candidate one. Returns (result, key);
+    key is None when caching is disabled.
+    """
+    from modules.prompts import EvaluationOutput, batch_evaluator_prompt_version, evaluator_prompt_version
+
+    cache = cache_from_env("evaluation", ".cache/evaluation.sqlite")
+    if cache is None:
+        return None, None
+    if packed:
+        version = f"packed:{batch_evaluator_prompt_version(jd_digest=jd_digest_enabled())}"
+    else:
+        version = evaluator_prompt_version(jd_digest=jd_digest_enabled())
+    key = cache_key("evaluation", redacted_resume, jd, _get_model_name(), version)
     try:
-        redactored_resume = redaction_run(resume_path=resume_path)
-        assr_logger.info("Resume redaction completed.")
+        cached = cache.get(key)
+        if cached is None:
+            metrics.set_cache_hit(False)
+            return None, key
+        result = EvaluationOutput.model_validate_json(cached)
     except Exception as e:
-        assr_logger.error(f"Resume redaction failed: {e}", exc_info=True)
-        return None
+        assr_logger.warning(f"Evaluation cache lookup failed: {e}")
+        metrics.set_cache_hit(False)
+        return None, key
+    metrics.set_cache_hit(True)
+    assr_logger.info(f"Evaluation cache hit ({cache.stats()}).")
+    return result, key
 
+
+def _store_evaluation(key: Optional[str], result: EvaluationOutput) -> None:
+    cache = cache_from_env("evaluation", ".cache/evaluation.sqlite")
+    if cache is None or key is None:
+        return
     try:
-        jd = _read_text_file(job_description, "Job description")
-        assr_logger.info("Successfully accessed the job description file.")
+        cache.put(key, result.model_dump_json())
     except Exception as e:
-        assr_logger.error(str(e), exc_info=True)
-        return None
+        assr_logger.warning(f"Evaluation cache write failed: {e}")
 
-    try:
-        llm = invoke_llm()
-        prompt = resume_eveluator_prompt()
-        structured_model = llm.with_structured_output(EvaluationOutput)
 
-        chain = prompt | structured_model
+def resume_evaluator(resume_path: str | Path, job_description: str | Path) -> Optional[EvaluationOutput]:
+    """
+    Redact the resume, evaluate against the job description using an LLM,
+    and print the structured JSON result. Returns the EvaluationOutput on success.
+    """
+    from modules.ratelimit import get_scheduler
+    from modules.redactor import redaction_run
+
+    with metrics.request("resume_evaluator") as request_span:
+        resume_path = Path(resume_path)
+        job_description = Path(job_description)
 
-        result: EvaluationOutput = chain.invoke({
-            "resume": redactored_resume,
-            "job_description": jd
-        })
+        try:
+            _validate_file_readable(resume_path, "Resume file")
+            _validate_file_readable(job_description, "Job description file")
+        except Exception as e:
+            assr_logger.error(str(e))
+            request_span.status = "error"
+            return None
+
+        try:
+            redactored_resume = redaction_run(resume_path=resume_path)
+            assr_logger.info("Resume redaction completed.")
+        except Exception as e:
+            assr_logger.error(f"Resume redaction failed: {e}", exc_info=True)
+            request_span.status = "error"
+            return None
+
+        try:
+            with metrics.span("jd_read"):
+                jd = _read_text_file(job_description, "Job description")
+            assr_logger.info("Successfully accessed the job description file.")
+            jd = prepare_job_description(jd)
+        except Exception as e:
+            assr_logger.error(str(e), exc_info=True)
+            request_span.status = "error"
+            return None
+
+        try:
+            with metrics.span("evaluation"):
+                result, key = _cached_evaluation(redactored_resume, jd)
+                if result is None:
+                    chain = _build_evaluation_chain()
+                    inputs = {
+                        "resume": redactored_resume,
+                        "job_description": jd
+                    }
+                    tokens = _evaluation_tokens(_evaluator_prompt(), inputs)
+
+                    result = _parse_evaluation(get_scheduler().run(lambda: chain.invoke(inputs), tokens=tokens))
+                    _store_evaluation(key, result)
+
+            print(result.model_dump_json(indent=2))
+            assr_logger.info("Resume assessment successful.")
+            return result
+
+        except Exception as e:
+            assr_logger.error(f"LLM evaluation failed: {e}", exc_info=True)
+            request_span.status = "error"
+            return None
+
+
+async def aevaluate_redacted(redacted_resume: str, jd: str) -> EvaluationOutput:
+    """
+    Evaluate an already redacted resume against job description text via the
+    async ainvoke path. Raises on failure; callers decide how to report it.
+    """
+    from modules.ratelimit import get_scheduler
 
-        print(result.model_dump_json(indent=2))
-        assr_logger.info("Resume assessment successful.")
+    with metrics.span("evaluation"):
+        result, key = _cached_evaluation(redacted_resume, jd)
+        if result is not None:
+            return result
+
+        chain = _build_evaluation_chain()
+        inputs = {
+            "resume": redacted_resume,
+            "job_description": jd
+        }
+        tokens = _evaluation_tokens(_evaluator_prompt(), inputs)
+        result = _parse_evaluation(await get_scheduler().arun(lambda: chain.ainvoke(inputs), tokens=tokens))
+        _store_evaluation(key, result)
         return result
 
-    except Exception as e:
-        assr_logger.error(f"LLM evaluation failed: {e}", exc_info=True)
-        return None
+
+async def _ainvoke_packed(jd: str, batch: list[tuple[str, str]]) -> list[CandidateEvaluation]:
+    """
+    Evaluate several redacted resumes against one job description in a single call.
+    When the response as a whole fails validation, the individually valid entries
+    are salvaged; the caller retries whichever candidates are missing.
+    """
+    from modules.packing import render_candidates
+    from modules.prompts import BatchEvaluationOutput, CandidateEvaluation, resume_batch_evaluator_prompt
+    from modules.ratelimit import get_scheduler
+
+    llm = invoke_llm()
+    prompt = resume_batch_evaluator_prompt(jd_digest=jd_digest_enabled())
+    chain = prompt | llm.with_structured_output(BatchEvaluationOutput, include_raw=True)
+    inputs = {
+        "job_description": jd,
+        "candidates": render_candidates(batch)
+    }
+    tokens = _evaluation_tokens(prompt, inputs, candidates=len(batch))
+    with metrics.span("evaluation", candidates=len(batch)):
+        output = await get_scheduler().arun(lambda: chain.ainvoke(inputs), tokens=tokens)
+        _record_evaluation_usage(output.get("raw"))
+        with metrics.span("validation", candidates=len(batch)) as validation_span:
+            if output.get("parsed") is not None:
+                return output["parsed"].candidates
+
+            entries: list[CandidateEvaluation] = []
+            try:
+                items = json.loads(getattr(output.get("raw"), "content", "") or "{}").get("candidates", [])
+            except Exception:
+                items = []
+            for item in items:
+                try:
+                    entries.append(CandidateEvaluation.model_validate(item))
+                except Exception:
+                    continue
+            validation_span.attributes["salvaged"] = len(entries)
+            return entries
+
+
+def _packed_overhead_tokens(jd: str) -> int:
+    from modules.packing import count_tokens
+    from modules.prompts import resume_batch_evaluator_prompt
+
+    messages = resume_batch_evaluator_prompt(jd_digest=jd_digest_enabled()).format_messages(job_description=jd, candidates="")
+    return sum(count_tokens(m.content, _get_model_name()) for m in messages)
+
+
+# ---------- Batch ----------
+def _collect_resumes(source: Path) -> list[Path]:
+    """
+    Resolve a batch source into resume paths. A directory yields its .txt, .pdf and
+    .docx files; any other file is read as a manifest with one path per line ('#'
+    comments allowed), relative paths being resolved against the manifest's directory.
+    """
+    from modules.ingest import SUPPORTED_EXTENSIONS
+
+    if source.is_dir():
+        return sorted(p for p in source.iterdir() if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS)
+
+    manifest = _read_text_file(source, "Resume manifest")
+    resumes: list[Path] = []
+    for line in manifest.splitlines():
+        entry = line.strip()
+        if not entry or entry.startswith("#"):
+            continue
+        path = Path(entry).expanduser()
+        if not path.is_absolute():
+            path = source.parent / path
+        resumes.append(path)
+    return resumes
+
+
+async def _read_resumes(resumes: list[Path]) -> dict[Path, str | Exception]:
+    """
+    Text of every resume, read concurrently so PDF and DOCX files are extracted in
+    parallel by the ingest pool. A resume that cannot be read maps to its error.
+    """
+    texts = await asyncio.gather(
+        *(asyncio.to_thread(_read_text_file, resume, "Resume file") for resume in resumes), return_exceptions=True
+    )
+    return dict(zip(resumes, texts))
+
+
+def _prescreen(
+    texts: dict[Path, str | Exception],
+    jds: dict[Path, str],
+    top_k: int,
+    min_score: float,
+) -> dict[Path, dict[Path, dict]]:
+    """
+    Rank resumes (`texts` from _read_resumes) per position with the local BM25 index
+    over offline-redacted text (no LLM calls) and decide the shortlist. Returns
+    position -> resume -> lexical score, relative score, rank and whether it was
+    shortlisted. Resumes that cannot be read are left out and go through the normal
+    path, which reports the error.
+    """
+    from modules.prescreen import index_from_env, shortlist
+    from modules.redactor import offline_redact
+
+    screening: dict[Path, dict[Path, dict]] = {}
+    with metrics.span("prescreen", resumes=len(texts), positions=len(jds)):
+        index = index_from_env()
+        keys: dict[Path, str] = {}
+        for resume, text in texts.items():
+            if isinstance(text, Exception):
+                assr_logger.warning(f"Pre-screen skipped {resume}: {text}")
+                continue
+            keys[resume] = str(resume.resolve())
+            index.add(keys[resume], offline_redact(text))
+        try:
+            index.save_if_changed()
+        except OSError as e:
+            assr_logger.warning(f"Could not save the pre-screen index: {e}")
+
+        indexed = list(keys)
+        for position, jd in jds.items():
+            scores = index.score(jd, [keys[resume] for resume in indexed])
+            selected, relative, ranks = shortlist(scores, top_k, min_score)
+            screening[position] = {
+                resume: {
+                    "lexical_score": round(float(scores[i]), 4),
+                    "relative_score": round(float(relative[i]), 4),
+                    "rank": int(ranks[i]),
+                    "shortlisted": bool(selected[i]),
+                }
+                for i, resume in enumerate(indexed)
+            }
+            assr_logger.info(f"Pre-screen for {position}: {int(selected.sum())}/{len(indexed)} resume(s) shortlisted.")
+    return screening
+
+
+def _dedupe(texts: dict[Path, str | Exception], threshold: float) -> dict[Path, tuple[Path, float]]:
+    """
+    Group near-duplicate resumes (`texts` from _read_resumes; estimated Jaccard
+    similarity of offline-redacted text >= `threshold`) with the persistent MinHash index. Returns duplicate ->
+    (representative, similarity) for every resume that need not be evaluated itself.
+    A representative indexed by an earlier run is used when its file still exists;
+    otherwise the group's first resume in this batch stands in for it.
+    """
+    from modules.dedupe import index_from_env
+    from modules.redactor import offline_redact
+
+    duplicates: dict[Path, tuple[Path, float]] = {}
+    with metrics.span("dedupe", resumes=len(texts)):
+        with index_from_env(threshold) as index:
+            matches: dict[Path, tuple[str, float]] = {}
+            for resume, text in texts.items():
+                if isinstance(text, Exception):
+                    assr_logger.warning(f"Duplicate check skipped {resume}: {text}")
+                    continue
+                matches[resume] = index.add(str(resume.resolve()), offline_redact(text))
+
+            batch = {str(resume.resolve()): resume for resume in matches}
+            stand_ins: dict[str, Path] = {}
+            for resume, (representative, similarity) in matches.items():
+                if representative == str(resume.resolve()):
+                    continue
+                rep = batch.get(representative) or Path(representative)
+                if representative not in batch and not rep.is_file():
+                    rep = stand_ins.setdefault(representative, resume)
+                    if rep == resume:
+                        continue
+                    similarity = index.compare(str(resume.resolve()), str(rep.resolve()))
+                if similarity < threshold:
+                    # Never reuse an evaluation of a resume that is not confirmed similar enough.
+                    continue
+                duplicates[resume] = (rep, similarity)
+    if duplicates:
+        assr_logger.info(f"Duplicate check: {len(duplicates)}/{len(texts)} resume(s) reuse another resume's evaluation.")
+    return duplicates
+
+
+def _content_ids(resumes: list[Path], positions: list[Path]) -> tuple[dict[Path, str], dict[Path, str]]:
+    """Results-store IDs of the job description and resume files; unreadable resumes get none."""
+    from modules.results import file_id
+
+    candidate_ids: dict[Path, str] = {}
+    for resume in resumes:
+        try:
+            candidate_ids[resume] = file_id(resume)
+        except OSError as e:
+            assr_logger.warning(f"Results store skipped {resume}: {e}")
+    return {position: file_id(position) for position in positions}, candidate_ids
+
+
+def _write_record(out: TextIO, record: dict) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+async def run_batch(
+    resumes: list[Path],
+    positions: list[Path],
+    out: TextIO,
+    concurrency: int = 4,
+    pack_tokens: int = 0,
+    pack_max: int = 8,
+    prescreen_top_k: int = 0,
+    prescreen_min_score: float = 0.0,
+    dedupe_threshold: float = 0.0,
+    results: Optional[ResultsStore] = None,
+    resume_run: bool = False,
+) -> int:
+    """
+    Evaluate every resume against every position concurrently, streaming one JSON
+    line per (resume, position) pair to `out` as soon as it finishes.
+    Each resume is redacted once and shared across positions; `concurrency` bounds
+    the number of in-flight LLM calls. With `pack_tokens` set, up to `pack_max`
+    resumes per position share one evaluation call within that prompt token budget.
+    With `prescreen_top_k` (K best) or `prescreen_min_score` (fraction of the best
+    lexical score) set, only each position's shortlist is redacted and evaluated; the
+    rest are recorded as "screened_out". Every record then carries its lexical score.
+    With JD_DIGEST on, each job description is digested once before any evaluation;
+    a position whose description fails validation gets an error record per resume.
+    With `dedupe_threshold` set, near-duplicate resumes are grouped and only one
+    representative per group is evaluated per position; the others get its result
+    with a "duplicate_of" marker and the estimated similarity.
+    With a `results` store, every finished pair is also committed there as it is
+    written, keyed by the content IDs of the resume and job description files; with
+    `resume_run`, pairs the store already holds an evaluation for are skipped.
+    Returns the number of failed pairs.
+    """
+    from modules.ingest import reserve_cache
+    from modules.llm import usage_totals
+    from modules.packing import evaluate_packed, pack_candidates
+    from modules.redactor import aredaction_run
+
+    # Pre-screen, dedupe and redaction each read every resume: keep all extracted texts.
+    reserve_cache(len(resumes) + len(positions))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    jds: dict[Path, str] = {}
+    for position in positions:
+        with metrics.span("jd_read"):
+            jds[position] = _read_text_file(position, "Job description")
+    assr_logger.info(f"Batch started: {len(resumes)} resume(s) x {len(positions)} position(s), concurrency={concurrency}.")
+
+    jd_ids: dict[Path, str] = {}
+    candidate_ids: dict[Path, str] = {}
+    done: dict[Path, set[Path]] = {position: set() for position in positions}
+    if results is not None:
+        jd_ids, candidate_ids = await asyncio.to_thread(_content_ids, resumes, positions)
+        if resume_run:
+            for position in positions:
+                completed = results.completed(jd_ids[position])
+                done[position] = {resume for resume in resumes if candidate_ids.get(resume) in completed}
+            skipped = sum(len(resumes_done) for resumes_done in done.values())
+            assr_logger.info(f"Resuming run: {skipped} pair(s) already in {results.path} are skipped.")
+
+    jd_errors: dict[Path, Exception] = {}
+    if jd_digest_enabled():
+        prepared = await asyncio.gather(*(aprepare_job_description(jds[position]) for position in positions), return_exceptions=True)
+        for position, jd in zip(positions, prepared):
+            if isinstance(jd, Exception):
+                jd_errors[position] = jd
+            else:
+                jds[position] = jd
+        positions = [position for position in positions if position not in jd_errors]
+
+    texts: dict[Path, str | Exception] = {}
+    if positions and (prescreen_top_k > 0 or prescreen_min_score > 0 or dedupe_threshold > 0):
+        texts = await _read_resumes(resumes)
+
+    screening: dict[Path, dict[Path, dict]] = {}
+    shortlisted = {position: resumes for position in positions}
+    if positions and (prescreen_top_k > 0 or prescreen_min_score > 0):
+        screening = await asyncio.to_thread(
+            _prescreen, texts, {position: jds[position] for position in positions}, prescreen_top_k, prescreen_min_score
+        )
+        shortlisted = {
+            position: [
+                resume for resume in resumes
+                if screening[position].get(resume, {"shortlisted": True})["shortlisted"]
+            ]
+            for position in positions
+        }
+    pending = {position: [resume for resume in shortlisted[position] if resume not in done[position]] for position in positions}
+
+    duplicates: dict[Path, tuple[Path, float]] = {}
+    if positions and dedupe_threshold > 0:
+        duplicates = await asyncio.to_thread(_dedupe, texts, dedupe_threshold)
+
+    # Per position, each evaluated resume and the shortlisted resumes that take its result.
+    # A representative indexed by an earlier run may be outside the batch: it is evaluated
+    # (usually from the caches) but only its duplicates are written.
+    groups: dict[Path, dict[Path, list[Path]]] = {position: {} for position in positions}
+    for position in positions:
+        for resume in pending[position]:
+            representative = duplicates[resume][0] if resume in duplicates else resume
+            groups[position].setdefault(representative, []).append(resume)
+
+    async def _redact(resume: Path) -> str:
+        async with semaphore:
+            return await aredaction_run(resume_path=resume)
+
+    needed = dict.fromkeys(resume for position in positions for resume in groups[position])
+    redactions = {resume: asyncio.ensure_future(_redact(resume)) for resume in needed}
+    failures = 0
+    screened_out = 0
+
+    def _record(resume: Path, position: Path, record: dict) -> None:
+        _write_record(out, record)
+        if results is not None and resume in candidate_ids:
+            try:
+                results.put(jd_ids[position], candidate_ids[resume], record)
+            except Exception as e:
+                assr_logger.warning(f"Could not store the result for {resume} x {position}: {e}")
+
+    def _emit(resume: Path, position: Path, result: Optional[EvaluationOutput], error: Optional[Exception]) -> None:
+        nonlocal failures
+        record = {"resume": str(resume), "position": str(position)}
+        if position in screening:
+            record["prescreen"] = screening[position].get(resume)
+        if resume in duplicates:
+            representative, similarity = duplicates[resume]
+            record.update(duplicate_of=str(representative), duplicate_similarity=round(similarity, 4))
+        if error is None and result is not None:
+            record.update(status="ok", result=result.model_dump())
+        else:
+            assr_logger.error(f"Batch evaluation failed for {resume} x {position}: {error}")
+            record.update(status="error", error=str(error))
+            failures += 1
+        _record(resume, position, record)
+
+    def _emit_group(representative: Path, position: Path, result: Optional[EvaluationOutput], error: Optional[Exception]) -> None:
+        for resume in groups[position][representative]:
+            _emit(resume, position, result, error)
+
+    async def _evaluate(resume: Path, position: Path) -> None:
+        with metrics.request("batch_pair") as request_span:
+            try:
+                redacted = await redactions[resume]
+                async with semaphore:
+                    result = await aevaluate_redacted(redacted, jds[position])
+            except Exception as e:
+                request_span.status = "error"
+                _emit_group(resume, position, None, e)
+                return
+            _emit_group(resume, position, result, None)
+
+    async def _evaluate_packed(position: Path) -> None:
+        with metrics.request("batch_position"):
+            await _evaluate_position_packed(position)
+
+    async def _evaluate_position_packed(position: Path) -> None:
+        jd = jds[position]
+        candidates: list[tuple[str, str]] = []
+        owners: dict[str, tuple[Path, Optional[str]]] = {}
+        # Resumes of lone leftovers, which are evaluated (and cached) by the single-candidate prompt.
+        singles: set[str] = set()
+        for resume in groups[position]:
+            try:
+                redacted = await redactions[resume]
+            except Exception as e:
+                _emit_group(resume, position, None, e)
+                continue
+            with metrics.span("evaluation_cache"):
+                cached, key = _cached_evaluation(redacted, jd)
+                if cached is None:
+                    cached, key = _cached_evaluation(redacted, jd, packed=True)
+            if cached is not None:
+                _emit_group(resume, position, cached, None)
+                continue
+            # Opaque IDs: file names may themselves identify the candidate.
+            candidate_id = f"C{len(candidates) + 1}"
+            owners[candidate_id] = (resume, key)
+            candidates.append((candidate_id, redacted))
+        redacted_by_id = dict(candidates)
+
+        def _on_result(candidate_id: str, result: Optional[EvaluationOutput], error: Optional[Exception]) -> None:
+            resume, key = owners[candidate_id]
+            if result is not None and redacted_by_id[candidate_id] not in singles:
+                _store_evaluation(key, result)
+            _emit_group(resume, position, result, error)
+
+        async def _invoke_batch(batch):
+            async with semaphore:
+                return await _ainvoke_packed(jd, batch)
+
+        async def _invoke_single(redacted: str) -> EvaluationOutput:
+            singles.add(redacted)
+            async with semaphore:
+                return await aevaluate_redacted(redacted, jd)
+
+        packs = pack_candidates(
+            candidates,
+            pack_tokens,
+            overhead_tokens=_packed_overhead_tokens(jd),
+            max_candidates=pack_max,
+            model=_get_model_name(),
+        )
+        assr_logger.info(f"Packed {len(candidates)} candidate(s) for {position} into {len(packs)} call(s).")
+        await asyncio.gather(*(evaluate_packed(pack, _invoke_batch, _invoke_single, _on_result) for pack in packs))
+
+    for position, error in jd_errors.items():
+        for resume in resumes:
+            _emit(resume, position, None, error)
+
+    for position in positions:
+        for resume in resumes:
+            if resume not in shortlisted[position] and resume not in done[position]:
+                _record(resume, position, {
+                    "resume": str(resume),
+                    "position": str(position),
+                    "prescreen": screening[position][resume],
+                    "status": "screened_out",
+                })
+                screened_out += 1
+
+    if pack_tokens > 0:
+        tasks = [_evaluate_packed(position) for position in positions]
+    else:
+        tasks = [_evaluate(resume, position) for position in positions for resume in groups[position]]
+    await asyncio.gather(*tasks)
+
+    skipped = sum(len(done[position]) for position in positions)
+    total = len(resumes) * (len(positions) + len(jd_errors)) - screened_out - skipped
+    summary = f"Batch finished: {total - failures} succeeded, {failures} failed, {screened_out} screened out"
+    if dedupe_threshold > 0:
+        reused = sum(resume in duplicates for position in positions for resume in pending[position])
+        summary += f", {reused} reused from a duplicate"
+    if resume_run:
+        summary += f", {skipped} already done"
+    assr_logger.info(summary + ".")
+    usage = usage_totals().get("evaluation")
+    if usage and usage.get("prompt_tokens"):
+        share = 100 * usage.get("cached_tokens", 0) / usage["prompt_tokens"]
+        assr_logger.info(
+            f"Evaluation calls: {usage['calls']}, prompt tokens: {usage['prompt_tokens']}, served from provider cache: "
+            f"{usage.get('cached_tokens', 0)} ({share:.1f}%)."
+        )
+    return failures
+
+
+# ---------- Server ----------
+async def _serve_job(payload: dict) -> dict:
+    """Server handler: redact and evaluate resume text against job description text."""
+    from modules.redactor import aredact_text
+    from modules.server import BadRequest
+
+    for name in ("resume", "job_description"):
+        value = payload.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise BadRequest(f"'{name}' must be a non-empty string.")
+    with metrics.request("serve"):
+        try:
+            jd = await aprepare_job_description(payload["job_description"])
+        except InvalidJobDescription as e:
+            raise BadRequest(str(e)) from e
+        redacted = await aredact_text(payload["resume"])
+        result = await aevaluate_redacted(redacted, jd)
+        return result.model_dump()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    queue_size: int = 100,
+    workers: int = 4,
+    timeout: float = 120.0,
+) -> None:
+    """
+    Run the long-lived evaluation server. Clients and prompt templates are created
+    once inside the serving event loop so every request reuses warm connections.
+    """
+    from modules.redactor import load_llm
+    from modules.server import EvaluationServer
+
+    invoke_llm()
+    load_llm()
+    _evaluator_prompt()
+    server = EvaluationServer(
+        _serve_job,
+        host=host,
+        port=port,
+        queue_size=queue_size,
+        workers=workers,
+        timeout=timeout,
+    )
+    await server.serve_forever()
+
+
+# ---------- Work queue ----------
+_QUEUE_POLL_SECONDS = 0.5
+# Redacted resumes a worker keeps for the other positions of the same resume; items are
+# enqueued resume by resume, so neighbouring claims usually share one.
+_WORKER_REDACTIONS = 256
+
+
+async def run_worker(queue_dir: str | Path, concurrency: int = 4, lease: float = 60.0) -> int:
+    """
+    Claim (resume, position) items from the shared work queue and evaluate them,
+    keeping up to `concurrency` items in flight, until the queue is sealed and
+    drained. Leases are renewed every quarter lease period, and leases of dead
+    workers are reaped while this worker waits for work. Returns the number of
+    failed items.
+    """
+    import socket
+    from collections import OrderedDict
+    from modules.redactor import aredaction_run, load_llm
+    from modules.workqueue import WorkItem, WorkQueue
+
+    queue = WorkQueue(queue_dir, lease)
+    worker = re.sub(r"[^\w.-]", "_", f"{socket.gethostname()}-{os.getpid()}")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    redactions: OrderedDict[str, asyncio.Future] = OrderedDict()
+    jds: dict[str, asyncio.Future] = {}
+    held: set[str] = set()
+    in_flight: set[asyncio.Task] = set()
+    failures = processed = 0
+
+    invoke_llm()
+    load_llm()
+    _evaluator_prompt()
+
+    async def _redact(resume: str) -> str:
+        async with semaphore:
+            return await aredaction_run(resume_path=resume)
+
+    async def _prepare_jd(position: str) -> str:
+        jd = await asyncio.to_thread(_read_text_file, Path(position), "Job description")
+        return await aprepare_job_description(jd)
+
+    def _shared(futures: dict, key: str, start) -> asyncio.Future:
+        future = futures.get(key)
+        if future is None:
+            future = futures[key] = asyncio.ensure_future(start(key))
+        return future
+
+    async def _process(item: WorkItem) -> None:
+        nonlocal failures, processed
+        record = {"resume": item.resume, "position": item.position, "worker": worker}
+        with metrics.request("queue_item") as request_span:
+            try:
+                jd = await _shared(jds, item.position, _prepare_jd)
+                redacted = await _shared(redactions, item.resume, _redact)
+                redactions.move_to_end(item.resume)
+                while len(redactions) > _WORKER_REDACTIONS:
+                    redactions.popitem(last=False)
+                async with semaphore:
+                    result = await aevaluate_redacted(redacted, jd)
+                record.update(status="ok", result=result.model_dump())
+            except Exception as e:
+                request_span.status = "error"
+                assr_logger.error(f"Work item {item.name} failed ({item.resume} x {item.position}): {e}")
+                record.update(status="error", error=str(e))
+                failures += 1
+        await asyncio.to_thread(queue.complete, item, worker, record)
+        held.discard(item.name)
+        processed += 1
+
+    async def _heartbeat() -> None:
+        while True:
+            await asyncio.sleep(lease / 4)
+            lost = await asyncio.to_thread(queue.heartbeat, worker, set(held))
+            for name in lost:
+                assr_logger.warning(f"Lease on {name} was lost; it may be evaluated twice.")
+
+    assr_logger.info(f"Worker {worker} started on {queue.root}, concurrency={concurrency}.")
+    heartbeat = asyncio.ensure_future(_heartbeat())
+    try:
+        while True:
+            while len(in_flight) < max(1, concurrency):
+                item = await asyncio.to_thread(queue.claim, worker)
+                if item is None:
+                    break
+                held.add(item.name)
+                in_flight.add(asyncio.ensure_future(_process(item)))
+            if not in_flight:
+                if await asyncio.to_thread(queue.finished):
+                    break
+                await asyncio.to_thread(queue.reap)
+                await asyncio.sleep(_QUEUE_POLL_SECONDS)
+                continue
+            finished, in_flight = await asyncio.wait(in_flight, timeout=_QUEUE_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.exception() is not None:
+                    # Completing the item failed; its lease expires and another worker retries it.
+                    assr_logger.error(f"Could not record a work item result: {task.exception()}")
+    finally:
+        heartbeat.cancel()
+        for task in in_flight:
+            task.cancel()
+    assr_logger.info(f"Worker {worker} finished: {processed} item(s), {failures} failed.")
+    return failures
+
+
+def _worker_env(workers: int, index: int) -> dict[str, str]:
+    """
+    Environment for local worker process `index`: an equal share of the per-key rate
+    limits, and its own log file, since file rotation cannot be shared between processes.
+    """
+    env = dict(os.environ)
+    for name in ("OPENAI_RPM_LIMIT", "OPENAI_TPM_LIMIT"):
+        limit = float(env.get(name, "0") or 0)
+        if limit > 0:
+            env[name] = str(limit / workers)
+    log_file = Path(env.get("LOG_FILE", "logs/resume_assesor.log").strip())
+    if not is_disabled(str(log_file)):
+        env["LOG_FILE"] = str(log_file.with_name(f"{log_file.stem}.worker{index}{log_file.suffix}"))
+    return env
+
+
+def run_queue(
+    resumes: list[Path],
+    positions: list[Path],
+    out: TextIO,
+    queue_dir: str | Path,
+    workers: int = 2,
+    concurrency: int = 4,
+    lease: float = 60.0,
+    results: Optional[ResultsStore] = None,
+    resume_run: bool = False,
+) -> int:
+    """
+    Coordinate a batch through the shared work queue at `queue_dir`: enqueue every
+    (resume, position) pair, start `workers` local worker processes (workers on
+    other hosts can join with --worker), and merge finished records into `out` and
+    the results store as they arrive. Re-running on the same queue picks up where a
+    previous coordinator stopped: failed pairs are evaluated again, and only records
+    it had not merged yet are written.
+    Returns the number of failed pairs.
+    """
+    import subprocess
+    from modules.workqueue import WorkQueue
+
+    queue = WorkQueue(queue_dir, lease)
+    jd_ids: dict[Path, str] = {}
+    candidate_ids: dict[Path, str] = {}
+    skip: set[tuple[str, str]] = set()
+    if results is not None:
+        jd_ids, candidate_ids = _content_ids(resumes, positions)
+        if resume_run:
+            for position in positions:
+                completed = results.completed(jd_ids[position])
+                skip.update((str(r), str(position)) for r in resumes if candidate_ids.get(r) in completed)
+            assr_logger.info(f"Resuming run: {len(skip)} pair(s) already in {results.path} are skipped.")
+    pairs = [
+        (str(resume.resolve()), str(position.resolve()))
+        for resume in resumes for position in positions
+        if (str(resume), str(position)) not in skip
+    ]
+    retried = queue.retry_failed()
+    added = queue.enqueue(pairs)
+    queue.seal()
+    assr_logger.info(f"Queue {queue.root}: {added} new item(s) enqueued, {retried} failed item(s) re-queued; {queue.counts()}.")
+
+    by_path = {str(path.resolve()): path for path in resumes + positions}
+    command = [sys.executable, os.path.abspath(__file__), "--worker", str(queue.root), "-c", str(concurrency), "--lease", str(lease)]
+    processes = [subprocess.Popen(command, env=_worker_env(workers, index)) for index in range(1, workers + 1)]
+    seen = queue.merged()
+    failures = merged = 0
+    try:
+        while True:
+            drained = queue.finished()
+            for name, record in queue.results(seen):
+                merged += 1
+                if record.get("status") != "ok":
+                    failures += 1
+                _write_record(out, record)
+                resume, position = by_path.get(record["resume"]), by_path.get(record["position"])
+                if results is not None and resume in candidate_ids and position in jd_ids:
+                    try:
+                        results.put(jd_ids[position], candidate_ids[resume], record)
+                    except Exception as e:
+                        assr_logger.warning(f"Could not store the result for {resume} x {position}: {e}")
+                queue.mark_merged(name)
+            if drained:
+                break
+            if processes and all(process.poll() is not None for process in processes):
+                queue.reap()
+                if not queue.finished():
+                    left = queue.counts()
+                    assr_logger.error(f"All local workers exited with work left: {left}. Re-run to continue.")
+                    failures += left["pending"] + left["leased"]
+                    break
+            time.sleep(_QUEUE_POLL_SECONDS)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+    assr_logger.info(f"Queue run finished: {merged} result(s) merged, {failures} failed.")
+    return failures
 
 
 # ---------- CLI ----------
@@ -153,32 +950,187 @@ def check_file_extension(filename: str) -> str:
     """
     Custom type function for argparse to validate the file extension.
     """
+    from modules.ingest import SUPPORTED_EXTENSIONS
+
     filepath = Path(filename)
-    if filepath.suffix.lower() != '.txt':
+    if filepath.suffix.lower() not in SUPPORTED_EXTENSIONS:
         assr_logger.critical("Input file format not supported")
-        raise argparse.ArgumentTypeError(f"File '{filename}' must have a .txt extension")
+        raise argparse.ArgumentTypeError(f"File '{filename}' must have a .txt, .pdf or .docx extension")
     else:
         return filename
 
 
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not an integer")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be at least 1")
+    return number
+
+
+def _fraction(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a number")
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be between 0 and 1")
+    return number
+
+
 def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Resume assessor")
-    parser.add_argument("-r", "--resume", help="Path to the resume.txt file", required=True, type=check_file_extension)
-    parser.add_argument("-p", "--position", help="Path to the position_description.txt file", required=True, type=check_file_extension)
-    return parser.parse_args(argv)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-r", "--resume", help="Path to the resume file (.txt, .pdf or .docx)", type=check_file_extension)
+    source.add_argument("-b", "--batch", help="Directory of resume .txt/.pdf/.docx files, or a manifest listing one resume path per line")
+    source.add_argument("-s", "--serve", help="Run the HTTP evaluation server (POST /evaluate, GET /health)", action="store_true")
+    source.add_argument("--worker", help="Evaluate (resume, position) items from a shared work queue directory until it is drained", metavar="QUEUE_DIR")
+    source.add_argument("--top", help="Print the N best stored results per position from the results store", type=_positive_int, metavar="N")
+    parser.add_argument("-p", "--position", help="Path to the position description file (.txt, .pdf or .docx; batch mode accepts several)", nargs="+", type=check_file_extension)
+    parser.add_argument("-c", "--concurrency", help="Maximum concurrent LLM calls in batch mode (per worker with a queue), or concurrent jobs in server mode (default: BATCH_CONCURRENCY or 4)", type=_positive_int, default=os.getenv("BATCH_CONCURRENCY", "4"))
+    parser.add_argument("-o", "--output", help="Batch mode JSONL output file (default: stdout)")
+    parser.add_argument("--pack-tokens", help="Batch mode: pack several resumes per evaluation call within this prompt token budget (default: PACK_TOKENS or 0, disabled)", type=int, default=os.getenv("PACK_TOKENS", "0"))
+    parser.add_argument("--pack-max", help="Batch mode: maximum resumes per packed call (default: PACK_MAX or 8)", type=_positive_int, default=os.getenv("PACK_MAX", "8"))
+    parser.add_argument("--prescreen-top-k", help="Batch mode: evaluate only the K lexically best-matching resumes per position (default: PRESCREEN_TOP_K or 0, disabled)", type=int, default=os.getenv("PRESCREEN_TOP_K", "0"))
+    parser.add_argument("--prescreen-min-score", help="Batch mode: evaluate only resumes scoring at least this fraction (0-1) of the best lexical score per position (default: PRESCREEN_MIN_SCORE or 0, disabled)", type=_fraction, default=os.getenv("PRESCREEN_MIN_SCORE", "0"))
+    parser.add_argument("--dedupe-threshold", help="Batch mode: evaluate one resume per group of near-duplicates at or above this estimated Jaccard similarity (0-1) and reuse its result for the rest (default: DEDUPE_THRESHOLD or 0, disabled)", type=_fraction, default=os.getenv("DEDUPE_THRESHOLD", "0"))
+    parser.add_argument("--results-db", help="Batch mode: SQLite store every finished pair is committed to, and --top reads from (default: RESULTS_DB or results.sqlite; 0 disables)", default=os.getenv("RESULTS_DB", "results.sqlite"))
+    parser.add_argument("--resume-run", help="Batch mode: skip pairs the results store already holds an evaluation for", action="store_true")
+    parser.add_argument("--queue", help="Batch mode: distribute the pairs through a work queue directory (shared storage for several hosts) to worker processes", metavar="QUEUE_DIR")
+    parser.add_argument("--workers", help="Queue mode: local worker processes to start; 0 relies on workers started elsewhere with --worker (default: QUEUE_WORKERS or 2)", type=int, default=os.getenv("QUEUE_WORKERS", "2"))
+    parser.add_argument("--lease", help="Queue and worker mode: seconds without a heartbeat before a claimed item is re-queued (default: QUEUE_LEASE or 60)", type=float, default=os.getenv("QUEUE_LEASE", "60"))
+    parser.add_argument("--host", help="Server mode: bind address (default: SERVER_HOST or 127.0.0.1)", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", help="Server mode: port (default: SERVER_PORT or 8000)", type=int, default=os.getenv("SERVER_PORT", "8000"))
+    parser.add_argument("--queue-size", help="Server mode: queued jobs before requests get 429 (default: SERVER_QUEUE_SIZE or 100)", type=_positive_int, default=os.getenv("SERVER_QUEUE_SIZE", "100"))
+    parser.add_argument("--timeout", help="Server mode: per-request timeout in seconds (default: SERVER_TIMEOUT or 120)", type=float, default=os.getenv("SERVER_TIMEOUT", "120"))
+    args = parser.parse_args(argv)
+    if not args.serve and not args.worker and not args.position:
+        parser.error("the following arguments are required: -p/--position")
+    if args.resume_run and not args.batch:
+        parser.error("--resume-run only applies to --batch")
+    if args.queue and (args.pack_tokens > 0 or args.prescreen_top_k > 0 or args.prescreen_min_score > 0 or args.dedupe_threshold > 0):
+        parser.error("--queue evaluates every pair on its own; it cannot be combined with packing, pre-screening or deduplication")
+    if args.resume and len(args.position) != 1:
+        parser.error("single resume mode accepts exactly one --position; use --batch for several")
+    return args
+
+
+def _run_batch_cli(args: argparse.Namespace) -> int:
+    source = Path(args.batch)
+    try:
+        resumes = _collect_resumes(source)
+    except Exception as e:
+        assr_logger.error(str(e))
+        return 1
+    if not resumes:
+        assr_logger.error(f"No resumes found in batch source: {source}")
+        return 1
+
+    from modules.results import store_from_env
+
+    positions = [Path(p) for p in args.position]
+    try:
+        for position in positions:
+            _validate_file_readable(position, "Job description file")
+    except Exception as e:
+        assr_logger.error(str(e))
+        return 1
+    results = store_from_env(args.results_db)
+    if args.resume_run and results is None:
+        assr_logger.error("--resume-run needs the results store; set --results-db.")
+        return 1
+    options = {
+        "concurrency": args.concurrency,
+        "pack_tokens": args.pack_tokens,
+        "pack_max": args.pack_max,
+        "prescreen_top_k": args.prescreen_top_k,
+        "prescreen_min_score": args.prescreen_min_score,
+        "dedupe_threshold": args.dedupe_threshold,
+        "results": results,
+        "resume_run": args.resume_run,
+    }
+    if args.queue:
+        options = {
+            "queue_dir": args.queue,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "lease": args.lease,
+            "results": results,
+            "resume_run": args.resume_run,
+        }
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as out:
+                failures = run_queue(resumes, positions, out, **options)
+        else:
+            failures = run_queue(resumes, positions, sys.stdout, **options)
+        return 0 if failures == 0 else 1
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as out:
+            failures = asyncio.run(run_batch(resumes, positions, out, **options))
+    else:
+        failures = asyncio.run(run_batch(resumes, positions, sys.stdout, **options))
+    return 0 if failures == 0 else 1
+
+
+def _print_top(args: argparse.Namespace) -> int:
+    """Write each position's top-N stored results as JSON lines, best first, with their rank."""
+    from modules.results import file_id, store_from_env
+
+    if not Path(args.results_db).is_file():
+        assr_logger.error(f"No results store found at {args.results_db}.")
+        return 1
+    try:
+        for position in args.position:
+            _validate_file_readable(Path(position), "Job description file")
+    except Exception as e:
+        assr_logger.error(str(e))
+        return 1
+    results = store_from_env(args.results_db)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for position in args.position:
+            for rank, record in enumerate(results.top(file_id(position), args.top), start=1):
+                _write_record(out, {"rank": rank, **record})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
 
 
 def _main(argv: list[str] | None = None) -> int:
+    setup_logging()
     args = _parse_args(argv)
     try:
-        result = resume_evaluator(resume_path=args.resume, job_description=args.position)
+        if args.serve:
+            asyncio.run(serve(args.host, args.port, args.queue_size, args.concurrency, args.timeout))
+            return 0
+        if args.batch:
+            return _run_batch_cli(args)
+        if args.worker:
+            failures = asyncio.run(run_worker(args.worker, args.concurrency, args.lease))
+            return 0 if failures == 0 else 1
+        if args.top:
+            return _print_top(args)
+        result = resume_evaluator(resume_path=args.resume, job_description=args.position[0])
         return 0 if result is not None else 1
     except KeyboardInterrupt:
-        assr_logger.warning("Interrupted by user.")
+        if args.batch and Path(args.results_db).is_file():
+            assr_logger.warning("Interrupted by user; finished pairs are in the results store, rerun with --resume-run to continue.")
+        else:
+            assr_logger.warning("Interrupted by user.")
         return 130
     except Exception as e:
         assr_logger.critical(f"Unhandled error: {e}", exc_info=True)
         return 1
+    finally:
+        metrics_file = os.getenv("METRICS_FILE")
+        if metrics_file:
+            try:
+                metrics.write_prometheus(metrics_file)
+            except OSError as e:
+                assr_logger.warning(f"Could not write metrics to {metrics_file}: {e}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,151 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from modules.common import ThreadConnections, is_disabled
+
+cache_logger = logging.getLogger("resume_assesor.cache")
+
+
+def cache_key(*parts: str) -> str:
+    """Content-address the given parts; length-prefixing keeps ('ab', 'c') and ('a', 'bc') distinct."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent key/value cache backed by SQLite in WAL mode.
+
+    Entries older than `max_age` seconds are treated as misses and purged; once
+    `max_entries` or `max_bytes` is exceeded the least recently used entries are
+    evicted. Each thread gets its own connection and SQLite's file locking makes
+    the store safe to share between processes.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        name: str = "cache",
+        max_entries: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: float = 30 * 24 * 3600,
+    ) -> None:
+        self.path = Path(path)
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connections = ThreadConnections(self.path)
+        self._stats_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _count(self, attr: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.max_age:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store `value` under `key`, then enforce the age and size limits."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            evicted = conn.execute("DELETE FROM entries WHERE created < ?", (now - self.max_age,)).rowcount
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    count -= 1
+                    total -= size
+                    evicted += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count("evictions", evicted)
+            cache_logger.debug(f"{self.name}: evicted {evicted} entr{'y' if evicted == 1 else 'ies'}.")
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss/eviction counters for this process."""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_caches: dict[str, Optional[ResultCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def cache_from_env(name: str, default_path: str) -> Optional[ResultCache]:
+    """
+    Return the process-wide cache called `name`, configured from the environment:
+      <NAME>_CACHE=0              disable this cache
+      <NAME>_CACHE_PATH           SQLite file (default: `default_path`)
+      CACHE_MAX_ENTRIES, CACHE_MAX_MB, CACHE_MAX_AGE_DAYS   shared limits
+    Returns None when the cache is disabled or cannot be opened.
+    """
+    with _caches_lock:
+        if name in _caches:
+            return _caches[name]
+        prefix = name.upper()
+        cache: Optional[ResultCache] = None
+        if not is_disabled(os.getenv(f"{prefix}_CACHE", "1")):
+            try:
+                cache = ResultCache(
+                    os.getenv(f"{prefix}_CACHE_PATH", default_path),
+                    name=name,
+                    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+                    max_bytes=int(float(os.getenv("CACHE_MAX_MB", "256")) * 1024 * 1024),
+                    max_age=float(os.getenv("CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+                )
+            except Exception as e:
+                cache_logger.warning(f"{name} cache disabled due to initialization error: {e}")
+        _caches[name] = cache
+        return cache
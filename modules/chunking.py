@@ -0,0 +1,89 @@
+import re
+from typing import Callable
+
+# Paragraphs end at blank lines; the blank lines stay with the paragraph before them.
+_PARAGRAPH_END_RE = re.compile(r"\n[ \t]*\n(?:[ \t]*\n)*")
+_BULLET_RE = re.compile(r"^[-*•·▪o]\s")
+
+
+def _paragraphs(text: str) -> list[str]:
+    pieces: list[str] = []
+    start = 0
+    for match in _PARAGRAPH_END_RE.finditer(text):
+        pieces.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _is_heading(piece: str) -> bool:
+    """A section heading: a short first line that is not a bullet or a sentence ("Experience", "PUBLICATIONS:")."""
+    line = piece.lstrip().split("\n", 1)[0].strip()
+    return 0 < len(line) <= 40 and not _BULLET_RE.match(line) and not line.endswith((".", ",", ";"))
+
+
+def _hard_split(piece: str, max_tokens: int, count: Callable[[str], int]) -> list[str]:
+    """Split an oversized line at whitespace (or anywhere, as a last resort) into pieces under max_tokens."""
+    pieces: list[str] = []
+    while piece and count(piece) > max_tokens:
+        chars_per_token = len(piece) / max(1, count(piece))
+        cut = max(1, int(max_tokens * chars_per_token * 0.9))
+        space = piece.rfind(" ", 0, cut)
+        if space > cut // 2:
+            cut = space + 1
+        pieces.append(piece[:cut])
+        piece = piece[cut:]
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def split_chunks(text: str, max_tokens: int, count: Callable[[str], int]) -> list[tuple[int, int]]:
+    """
+    Split `text` into contiguous (start, end) ranges of at most ~`max_tokens` tokens
+    as measured by `count`, cutting at paragraph boundaries and preferring to start a
+    chunk at a section heading. Paragraphs that are too long are split by lines, and
+    lines that are too long at whitespace. The ranges cover the text exactly, so
+    joining text[start:end] over them gives the input back.
+    """
+    units: list[str] = []
+    for paragraph in _paragraphs(text):
+        if count(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for line in paragraph.splitlines(keepends=True):
+            units.extend([line] if count(line) <= max_tokens else _hard_split(line, max_tokens, count))
+
+    bounds: list[tuple[int, int]] = []
+    start = position = used = 0
+    for unit in units:
+        tokens = count(unit)
+        full = used + tokens > max_tokens
+        # Past half a chunk, a new section starts a new chunk rather than being split across two.
+        new_section = used > max_tokens // 2 and _is_heading(unit)
+        if position > start and (full or new_section):
+            bounds.append((start, position))
+            start, used = position, 0
+        position += len(unit)
+        used += tokens
+    if position > start or not bounds:
+        bounds.append((start, position))
+    return bounds
+
+
+def context_windows(text: str, bounds: list[tuple[int, int]], overlap_chars: int) -> list[tuple[int, int]]:
+    """
+    Widen each chunk by about `overlap_chars` on both sides, snapped outwards to whole
+    lines, so text straddling a chunk boundary is seen whole by at least one window.
+    """
+    windows: list[tuple[int, int]] = []
+    for start, end in bounds:
+        if overlap_chars > 0:
+            if start > 0:
+                start = text.rfind("\n", 0, max(0, start - overlap_chars)) + 1
+            if end < len(text):
+                line_end = text.find("\n", min(len(text), end + overlap_chars))
+                end = len(text) if line_end == -1 else line_end + 1
+        windows.append((start, end))
+    return windows
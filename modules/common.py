@@ -0,0 +1,38 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Setting values that switch a feature off (or, for path settings, select no file).
+DISABLED_VALUES = frozenset({"", "0", "false", "no", "off"})
+
+
+def is_disabled(value: Optional[str]) -> bool:
+    """True when a setting is empty, 0, false, no or off (in any case)."""
+    return (value or "").strip().lower() in DISABLED_VALUES
+
+
+def connect_wal(path: str | Path, *, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a SQLite store shared between threads and processes: autocommit (transactions
+    are explicit), WAL journal so readers never block the writer, synchronous=NORMAL
+    and a 30 second wait on a locked database.
+    """
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ThreadConnections:
+    """One connect_wal connection to `path` per thread, opened on first use."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_wal(self.path)
+        return conn
@@ -0,0 +1,258 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from modules.common import connect_wal, is_disabled
+
+dd_logger = logging.getLogger("resume_assesor.dedupe")
+
+_WORD_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures must stay comparable with the ones persisted by earlier runs.
+_SEED = 1
+
+
+class Match(NamedTuple):
+    """Outcome of indexing a document: the group representative and the estimated
+    Jaccard similarity to it (1.0 and the document itself when it is unique)."""
+    representative: str
+    similarity: float
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """Overlapping `size`-word shingles of lowercased text; a shorter text is one shingle."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.99) -> tuple[int, int]:
+    """
+    (bands, rows) for LSH banding: the most rows per band (fewest false candidates)
+    for which a pair at exactly `threshold` still shares a bucket with probability
+    `recall`, i.e. 1 - (1 - threshold**rows)**bands >= recall.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class DuplicateIndex:
+    """
+    MinHash/LSH near-duplicate index persisted in SQLite (WAL mode).
+
+    Each document is reduced to a `num_perm`-value MinHash signature of its word
+    shingles. Signatures are cut into LSH bands whose bucket hashes are indexed, so
+    finding candidates is a handful of indexed lookups however many documents are
+    stored. A document joins the earliest-seen group whose representative's own
+    signature is at least `threshold` similar to it, so every member is confirmed
+    against the representative whose evaluation it reuses. Documents grouped under
+    another threshold are grouped again when they are next added.
+    """
+
+    def __init__(self, path: str | Path = ":memory:", threshold: float = 0.9, num_perm: int = 128) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.path = str(path)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._band_weights = rng.integers(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = connect_wal(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " key TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " signature BLOB NOT NULL,"
+            " representative TEXT NOT NULL,"
+            " seen REAL NOT NULL,"
+            " threshold REAL)"
+        )
+        columns = {name for _, name, *_ in self._conn.execute("PRAGMA table_info(documents)")}
+        if "threshold" not in columns:
+            # Indexes from before thresholds were recorded: every entry is grouped again on its next add.
+            self._conn.execute("ALTER TABLE documents ADD COLUMN threshold REAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, bucket INTEGER NOT NULL, key TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, bucket)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (key)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._check_layout()
+
+    def __enter__(self) -> "DuplicateIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ---------- Signatures ----------
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint32 per permutation) of the text's shingles."""
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles(text)),
+            dtype=np.uint64,
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # Universal hashing (a*x + b) mod p per permutation; uint64 wrap-around is intended.
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity: the share of equal signature values."""
+        return float(np.mean(first == second))
+
+    def _buckets(self, signatures: np.ndarray) -> np.ndarray:
+        """Bucket hash (int64) of every band of each signature row, shape (n, bands)."""
+        used = signatures[:, : self.bands * self.rows].astype(np.uint64).reshape(len(signatures), self.bands, self.rows)
+        return (used * self._band_weights).sum(axis=2).view(np.int64)
+
+    def _check_layout(self) -> None:
+        """Rebuild the band table from the stored signatures when the banding has changed."""
+        layout = f"{self.num_perm}:{self.bands}x{self.rows}:{_SEED}"
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'layout'").fetchone()
+        if row is not None and row[0] == layout:
+            return
+        keys, blobs = [], []
+        for key, blob in self._conn.execute("SELECT key, signature FROM documents"):
+            keys.append(key)
+            blobs.append(blob)
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM bands")
+            if keys:
+                if row is not None and row[0].split(":")[0] != str(self.num_perm):
+                    raise RuntimeError(f"Duplicate index {self.path} uses other MinHash settings; delete it to start over.")
+                signatures = np.stack([np.frombuffer(blob, dtype=np.uint32) for blob in blobs])
+                buckets = self._buckets(signatures)
+                self._conn.executemany(
+                    "INSERT INTO bands (band, bucket, key) VALUES (?, ?, ?)",
+                    ((band, int(buckets[i, band]), key) for i, key in enumerate(keys) for band in range(self.bands)),
+                )
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('layout', ?)", (layout,))
+        if keys:
+            dd_logger.info(f"Rebuilt LSH bands for {len(keys)} document(s) ({self.bands} bands x {self.rows} rows).")
+
+    # ---------- Updates ----------
+    def add(self, key: str, text: str) -> Match:
+        """
+        Index `text` under `key` and return its group representative. Re-adding unchanged
+        text returns the stored group if it was formed under the current threshold;
+        changed text is re-indexed and grouped again.
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, representative, signature, seen, threshold FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            unchanged = row is not None and row[0] == digest
+            if unchanged:
+                signature = np.frombuffer(row[2], dtype=np.uint32)
+                if row[4] == self.threshold:
+                    match = self._match(key, row[1], signature)
+                    if match.similarity >= self.threshold:
+                        return match
+            else:
+                signature = self.signature(text)
+            buckets = self._buckets(signature[None, :])[0]
+            representative = self._group(key, signature, buckets)
+
+            with self._conn:
+                self._conn.execute("BEGIN")
+                if unchanged:
+                    self._conn.execute(
+                        "UPDATE documents SET representative = ?, threshold = ? WHERE key = ?",
+                        (representative, self.threshold, key),
+                    )
+                else:
+                    self._conn.execute("DELETE FROM bands WHERE key = ?", (key,))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO documents (key, digest, signature, representative, seen, threshold)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, digest, signature.tobytes(), representative, row[3] if row is not None else time.time(), self.threshold),
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO bands (band, bucket, key) VALUES (?, ?, ?)",
+                        ((band, int(bucket), key) for band, bucket in enumerate(buckets)),
+                    )
+            return self._match(key, representative, signature)
+
+    def _group(self, key: str, signature: np.ndarray, buckets: np.ndarray) -> str:
+        """
+        The earliest-seen representative, among those of the documents sharing a band
+        bucket with `buckets`, whose own signature is at least `threshold` similar;
+        `key` itself when there is none.
+        """
+        keys: set[str] = set()
+        for band, bucket in enumerate(buckets):
+            keys.update(
+                k for (k,) in self._conn.execute("SELECT key FROM bands WHERE band = ? AND bucket = ?", (band, int(bucket)))
+            )
+        keys.discard(key)
+        if not keys:
+            return key
+        placeholders = ",".join("?" * len(keys))
+        representatives = {
+            rep for (rep,) in self._conn.execute(f"SELECT representative FROM documents WHERE key IN ({placeholders})", tuple(keys))
+        }
+        representatives.discard(key)
+        if not representatives:
+            return key
+        placeholders = ",".join("?" * len(representatives))
+        best, earliest = key, None
+        for candidate, blob, seen in self._conn.execute(
+            f"SELECT key, signature, seen FROM documents WHERE key IN ({placeholders})", tuple(representatives)
+        ):
+            score = self.similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold and (earliest is None or seen < earliest):
+                best, earliest = candidate, seen
+        return best
+
+    def compare(self, first: str, second: str) -> float:
+        """Estimated Jaccard similarity of two indexed documents."""
+        rows = dict(self._conn.execute("SELECT key, signature FROM documents WHERE key IN (?, ?)", (first, second)))
+        if first not in rows or second not in rows:
+            raise KeyError(f"Not indexed: {first if first not in rows else second}")
+        return self.similarity(np.frombuffer(rows[first], dtype=np.uint32), np.frombuffer(rows[second], dtype=np.uint32))
+
+    def _match(self, key: str, representative: str, signature: np.ndarray) -> Match:
+        if representative == key:
+            return Match(key, 1.0)
+        row = self._conn.execute("SELECT signature FROM documents WHERE key = ?", (representative,)).fetchone()
+        if row is None:
+            return Match(key, 1.0)
+        return Match(representative, self.similarity(signature, np.frombuffer(row[0], dtype=np.uint32)))
+
+
+def index_from_env(threshold: float, default_path: str = ".cache/dedupe.sqlite") -> DuplicateIndex:
+    """
+    Duplicate index configured from the environment:
+      DEDUPE_INDEX   SQLite file of persisted signatures (default .cache/dedupe.sqlite);
+                     0 keeps signatures in memory for this run only
+    """
+    path = os.getenv("DEDUPE_INDEX", default_path).strip()
+    if is_disabled(path):
+        path = ":memory:"
+    return DuplicateIndex(path, threshold=threshold)
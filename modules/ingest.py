@@ -0,0 +1,237 @@
+import io
+import os
+import re
+import asyncio
+import logging
+import zipfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+from xml.etree import ElementTree
+
+ing_logger = logging.getLogger("resume_assesor.ingest")
+
+TEXT_EXTENSIONS = (".txt",)
+DOCUMENT_EXTENSIONS = (".pdf", ".docx")
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + DOCUMENT_EXTENSIONS
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Largest XML part read from a .docx, so a zip bomb cannot exhaust memory.
+_MAX_DOCX_PART_BYTES = 64 * 1024 * 1024
+# Extracted texts memoised by default; reserve_cache raises the limit for large batches.
+_MAX_CACHED_TEXTS = 256
+
+
+# ---------- Extractors (run in worker processes) ----------
+def _docx_paragraph(paragraph: ElementTree.Element) -> str:
+    """Text of one w:p; nested paragraphs (text boxes) are emitted on their own."""
+    pieces: list[str] = []
+
+    def _walk(element: ElementTree.Element) -> None:
+        for child in element:
+            if child.tag == f"{_W}p":
+                continue
+            if child.tag == f"{_W}t":
+                pieces.append(child.text or "")
+            elif child.tag == f"{_W}tab":
+                pieces.append("\t")
+            elif child.tag in (f"{_W}br", f"{_W}cr"):
+                pieces.append("\n")
+            _walk(child)
+
+    _walk(paragraph)
+    return "".join(pieces)
+
+
+def _docx_part(archive: zipfile.ZipFile, name: str) -> str:
+    if archive.getinfo(name).file_size > _MAX_DOCX_PART_BYTES:
+        raise ValueError(f"DOCX part {name} is too large to extract.")
+    root = ElementTree.fromstring(archive.read(name))
+    return "\n".join(_docx_paragraph(paragraph) for paragraph in root.iter(f"{_W}p"))
+
+
+def extract_docx(data: bytes) -> str:
+    """
+    Plain text of a .docx: page headers, the body (paragraphs and table cells in
+    document order, one per line) and footers. Headers and footers are kept because
+    contact details often live there and must reach the redactor.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid DOCX file: {e}") from e
+    with archive:
+        names = archive.namelist()
+        if "word/document.xml" not in names:
+            raise ValueError("Not a valid DOCX file: word/document.xml is missing.")
+        headers = sorted(n for n in names if re.fullmatch(r"word/header\d*\.xml", n))
+        footers = sorted(n for n in names if re.fullmatch(r"word/footer\d*\.xml", n))
+        parts: list[str] = []
+        for name in headers + ["word/document.xml"] + footers:
+            try:
+                text = _docx_part(archive, name).strip()
+            except ElementTree.ParseError as e:
+                raise ValueError(f"Malformed DOCX part {name}: {e}") from e
+            # First-page, even-page and default headers are often identical.
+            if text and text not in parts:
+                parts.append(text)
+    return "\n\n".join(parts)
+
+
+def extract_pdf(data: bytes) -> str:
+    """Plain text of a PDF's pages, separated by blank lines. Needs the optional `pypdf` package."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF resumes need the optional 'pypdf' package: pip install pypdf") from None
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        raise ValueError(f"Could not parse PDF: {e}") from e
+    return "\n\n".join(page.strip() for page in pages if page.strip())
+
+
+def _extract_file(path: str, max_file_bytes: int) -> str:
+    """Worker entry point: read and extract one document."""
+    file = Path(path)
+    size = file.stat().st_size
+    if size > max_file_bytes:
+        raise ValueError(f"Input file is too large: {size} bytes (limit {max_file_bytes} bytes).")
+    data = file.read_bytes()
+    if file.suffix.lower() == ".pdf":
+        return extract_pdf(data)
+    return extract_docx(data)
+
+
+# ---------- Process pool ----------
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_generation = 0
+_slots: Optional[threading.BoundedSemaphore] = None
+
+_cache_lock = threading.Lock()
+_texts: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+_max_cached = _MAX_CACHED_TEXTS
+
+
+def _settings() -> tuple[int, float, int]:
+    """
+    Extraction settings:
+      INGEST_WORKERS         extraction processes (default: number of CPU cores)
+      INGEST_TIMEOUT         seconds allowed per document (default 30)
+      INGEST_MAX_FILE_MB     largest PDF/DOCX file accepted (default 50)
+    """
+    workers = int(os.getenv("INGEST_WORKERS", "0")) or os.cpu_count() or 1
+    return workers, float(os.getenv("INGEST_TIMEOUT", "30")), int(float(os.getenv("INGEST_MAX_FILE_MB", "50")) * 1024 * 1024)
+
+
+def _get_pool(workers: int) -> tuple[ProcessPoolExecutor, int]:
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs event loops and HTTP client threads is unsafe.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(workers)
+            ing_logger.debug(f"Started text extraction pool with {workers} worker(s).")
+        return _pool, _generation
+
+
+def _restart_pool(generation: int) -> None:
+    """Kill the workers of pool `generation` if it is still current; the next call starts a fresh pool."""
+    global _pool, _generation
+    with _pool_lock:
+        if generation != _generation or _pool is None:
+            return
+        pool, _pool = _pool, None
+        _generation += 1
+    # ProcessPoolExecutor has no public way to stop a busy worker.
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    """Stop the extraction processes (they are also stopped at interpreter exit)."""
+    _restart_pool(_generation)
+
+
+def _extract_in_pool(path: Path) -> str:
+    workers, timeout, max_file_bytes = _settings()
+    _get_pool(workers)
+    # One document per worker at a time, so the timeout measures parsing, not queueing.
+    with _slots:
+        retried = False
+        while True:
+            pool, generation = _get_pool(workers)
+            try:
+                future = pool.submit(_extract_file, str(path), max_file_bytes)
+            except RuntimeError:
+                # Broken or shut down since _get_pool (a timeout elsewhere); start over on a new pool.
+                _restart_pool(generation)
+                continue
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                _restart_pool(generation)
+                raise TimeoutError(f"Text extraction timed out after {timeout:g}s: {path}") from None
+            except BrokenProcessPool:
+                # Another document's timeout (or a crash) took the pool down; retry once on a new one.
+                _restart_pool(generation)
+                if retried:
+                    raise RuntimeError(f"Text extraction worker crashed on {path}") from None
+                retried = True
+
+
+def reserve_cache(documents: int) -> None:
+    """Memoise at least `documents` extracted texts, so every stage of a batch that size parses each document once."""
+    global _max_cached
+    with _cache_lock:
+        _max_cached = max(_max_cached, documents)
+
+
+def read_document(path: str | Path, max_bytes: Optional[int] = None) -> str:
+    """
+    Text of a .txt, .pdf or .docx file, entirely in memory. PDF and DOCX parsing runs
+    in the shared process pool with a per-file timeout; results are memoised by path,
+    size and modification time, so a document read by several stages is parsed once.
+    `max_bytes` bounds the text (UTF-8) that is returned.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file type '{suffix}': expected one of {', '.join(SUPPORTED_EXTENSIONS)}.")
+    if suffix in TEXT_EXTENSIONS:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    else:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with _cache_lock:
+            text = _texts.get(key)
+            if text is not None:
+                _texts.move_to_end(key)
+        if text is None:
+            text = _extract_in_pool(path)
+            if not text.strip():
+                raise ValueError(f"No text could be extracted from {path} (a scanned PDF needs OCR first).")
+            ing_logger.info(f"Extracted {len(text)} characters from {path.name}.")
+            with _cache_lock:
+                _texts[key] = text
+                while len(_texts) > _max_cached:
+                    _texts.popitem(last=False)
+    if max_bytes is not None and len(text.encode("utf-8")) > max_bytes:
+        raise ValueError(f"Extracted text is too large: {path} (limit {max_bytes} bytes).")
+    return text
+
+
+async def aread_document(path: str | Path, max_bytes: Optional[int] = None) -> str:
+    """read_document without blocking the event loop: the wait for the pool happens in a thread."""
+    return await asyncio.to_thread(read_document, path, max_bytes)
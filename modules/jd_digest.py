@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+from modules import metrics
+from modules.cache import cache_from_env, cache_key
+from modules.common import is_disabled
+
+# pydantic and the LLM stack are imported on first use, like the rest of the pipeline.
+if TYPE_CHECKING:
+    from modules.prompts import JobDigest
+
+jd_logger = logging.getLogger("resume_assesor.jd_digest")
+
+# Expected completion size for the rate-limit token estimate.
+_DIGEST_COMPLETION_TOKENS = 600
+
+# Digests made in this process, by cache key, so each posting is digested once per run
+# even with the persistent cache disabled. Concurrent callers for the same posting
+# wait for the first one (a per-key lock for threads, a shared task for coroutines).
+_lock = threading.Lock()
+_digests: dict[str, JobDigest] = {}
+_key_locks: dict[str, threading.Lock] = {}
+_pending: dict[str, asyncio.Future] = {}
+
+
+class InvalidJobDescription(ValueError):
+    """The digest step judged the input not to be a usable job posting."""
+
+
+def jd_digest_enabled() -> bool:
+    """
+    JD_DIGEST=1 evaluates candidates against a once-per-posting requirements digest
+    instead of the raw job description (default: off).
+    """
+    return not is_disabled(os.getenv("JD_DIGEST", "0"))
+
+
+def _llm_settings() -> dict[str, Any]:
+    """Model settings for the digest call; also part of the digest cache key."""
+    return {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o").strip() or "gpt-4o",
+        "temperature": 0,
+        "top_p": 1,
+    }
+
+
+def _digest_key(job_description: str) -> str:
+    """Hash of everything a digest depends on: the posting, the digest prompt and the model settings."""
+    from modules.prompts import jd_digest_prompt_version
+
+    settings = ",".join(f"{k}={v}" for k, v in sorted(_llm_settings().items()))
+    return cache_key("jd_digest", job_description, jd_digest_prompt_version(), settings)
+
+
+# ---------- Cache ----------
+def _cached_digest(key: str) -> Optional[JobDigest]:
+    from modules.prompts import JobDigest
+
+    cache = cache_from_env("jd_digest", ".cache/jd_digest.sqlite")
+    if cache is None:
+        return None
+    try:
+        cached = cache.get(key)
+        digest = JobDigest.model_validate_json(cached) if cached is not None else None
+    except Exception as e:
+        jd_logger.warning(f"JD digest cache lookup failed: {e}")
+        digest = None
+    metrics.set_cache_hit(digest is not None)
+    if digest is not None:
+        jd_logger.info(f"JD digest cache hit ({cache.stats()}).")
+    return digest
+
+
+def _store_digest(key: str, digest: JobDigest) -> None:
+    cache = cache_from_env("jd_digest", ".cache/jd_digest.sqlite")
+    if cache is None:
+        return
+    try:
+        cache.put(key, digest.model_dump_json())
+    except Exception as e:
+        jd_logger.warning(f"JD digest cache write failed: {e}")
+
+
+# ---------- LLM ----------
+def _digest_call(job_description: str) -> tuple[Any, dict[str, str], int]:
+    """The structured digest chain, its inputs and the rate-limit token estimate."""
+    from modules.llm import get_chat_model
+    from modules.prompts import JobDigest, jd_digest_prompt
+    from modules.ratelimit import estimate_tokens
+
+    settings = _llm_settings()
+    prompt = jd_digest_prompt()
+    llm = get_chat_model(**settings, max_retries=0)
+    chain = prompt | llm.with_structured_output(JobDigest, include_raw=True)
+    inputs = {"job_description": job_description}
+    tokens = estimate_tokens(prompt.format_messages(**inputs), _DIGEST_COMPLETION_TOKENS, settings["model"])
+    return chain, inputs, tokens
+
+
+def _parse_digest(output: dict) -> JobDigest:
+    from modules.llm import record_usage, usage_from_message
+
+    record_usage("jd_digest", usage_from_message(output.get("raw")))
+    if output.get("parsing_error") is not None or output.get("parsed") is None:
+        raise RuntimeError(f"JD digest failed schema validation: {output.get('parsing_error')}")
+    return output["parsed"]
+
+
+def _finish(job_description: str, key: str, digest: JobDigest, digest_span: metrics.Span, fresh: bool) -> JobDigest:
+    if fresh:
+        _store_digest(key, digest)
+    rendered = digest.render()
+    digest_span.attributes.update(jd_chars=len(job_description), digest_chars=len(rendered))
+    if fresh:
+        jd_logger.info(f"Job description digested: {len(job_description)} -> {len(rendered)} characters.")
+    with _lock:
+        _digests[key] = digest
+    return digest
+
+
+def _checked(digest: JobDigest) -> JobDigest:
+    if not digest.is_valid_job_description:
+        raise InvalidJobDescription(f"Job description failed validation: {digest.validation_issue or 'no reason given'}")
+    return digest
+
+
+def digest_job_description(job_description: str) -> JobDigest:
+    """
+    Validate and condense a job description into a JobDigest, once per posting:
+    results are kept in memory and in the "jd_digest" result cache (JD_DIGEST_CACHE,
+    default .cache/jd_digest.sqlite) keyed on the posting's content hash.
+    Raises ValueError when the posting fails validation.
+    """
+    from modules.ratelimit import get_scheduler
+
+    key = _digest_key(job_description)
+    with _lock:
+        digest = _digests.get(key)
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    if digest is not None:
+        return _checked(digest)
+
+    with key_lock:
+        with _lock:
+            digest = _digests.get(key)
+        if digest is None:
+            with metrics.span("jd_digest") as digest_span:
+                digest = _cached_digest(key)
+                fresh = digest is None
+                if fresh:
+                    chain, inputs, tokens = _digest_call(job_description)
+                    digest = _parse_digest(get_scheduler().run(lambda: chain.invoke(inputs), tokens=tokens))
+                _finish(job_description, key, digest, digest_span, fresh)
+    return _checked(digest)
+
+
+async def _adigest(job_description: str, key: str) -> JobDigest:
+    from modules.ratelimit import get_scheduler
+
+    with metrics.span("jd_digest") as digest_span:
+        digest = _cached_digest(key)
+        fresh = digest is None
+        if fresh:
+            chain, inputs, tokens = _digest_call(job_description)
+            digest = _parse_digest(await get_scheduler().arun(lambda: chain.ainvoke(inputs), tokens=tokens))
+        return _finish(job_description, key, digest, digest_span, fresh)
+
+
+async def adigest_job_description(job_description: str) -> JobDigest:
+    """Async counterpart of digest_job_description."""
+    key = _digest_key(job_description)
+    with _lock:
+        digest = _digests.get(key)
+    if digest is not None:
+        return _checked(digest)
+
+    loop = asyncio.get_running_loop()
+    pending = _pending.get(key)
+    if pending is None or pending.get_loop() is not loop:
+        pending = asyncio.ensure_future(_adigest(job_description, key))
+        _pending[key] = pending
+        pending.add_done_callback(lambda done: _pending.pop(key, None) if _pending.get(key) is done else None)
+    # Shielded so one cancelled caller does not cancel the digest the others wait for.
+    return _checked(await asyncio.shield(pending))
+
+
+def prepare_job_description(job_description: str) -> str:
+    """The job description text evaluations use: its rendered digest with JD_DIGEST on, else unchanged."""
+    if not jd_digest_enabled():
+        return job_description
+    return digest_job_description(job_description).render()
+
+
+async def aprepare_job_description(job_description: str) -> str:
+    """Async counterpart of prepare_job_description."""
+    if not jd_digest_enabled():
+        return job_description
+    return (await adigest_job_description(job_description)).render()
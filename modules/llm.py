@@ -0,0 +1,151 @@
+import os
+import asyncio
+import logging
+import warnings
+import threading
+import importlib.util
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from modules import metrics
+from modules.common import is_disabled
+from modules.ratelimit import get_scheduler
+
+llm_logger = logging.getLogger("resume_assesor.llm")
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+_models: dict[tuple, ChatOpenAI] = {}
+# httpx async pools are bound to the event loop that opened them, so async-capable
+# models are kept per loop and dropped together with it.
+_loop_models: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, ChatOpenAI]]" = WeakKeyDictionary()
+
+# with_structured_output(..., include_raw=True) makes langchain-openai model_dump() the SDK's
+# ParsedChatCompletion, whose `parsed` field is typed None while holding our schema object, so
+# pydantic warns on every structured call. The output itself is unaffected; ignore exactly that
+# warning (and only when it is the sole one reported), process-wide since calls run on worker threads.
+warnings.filterwarnings(
+    "ignore",
+    message=r"Pydantic serializer warnings:(\s+PydanticSerializationUnexpectedValue\(Expected `none`[^\n]*field_name='parsed'[^\n]*)+\s*\Z",
+    category=UserWarning,
+)
+
+
+def _env_flag(name: str, default: Optional[bool] = None) -> Optional[bool]:
+    value = os.getenv(name, "").strip().lower()
+    if value in {"1", "true", "yes", "on"}:
+        return True
+    if value and is_disabled(value):
+        return False
+    return default
+
+
+def _client_options() -> dict[str, Any]:
+    """
+    Connection pool settings shared by the sync and async HTTP clients:
+      OPENAI_POOL_SIZE          max open connections (default 20)
+      OPENAI_KEEPALIVE          max idle keep-alive connections (default: pool size)
+      OPENAI_KEEPALIVE_EXPIRY   seconds an idle connection is kept (default 30)
+      OPENAI_HTTP2              1/0 to force HTTP/2 on or off (default: on when `h2` is installed)
+      OPENAI_TIMEOUT            request timeout in seconds (default 120)
+    """
+    pool_size = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=int(os.getenv("OPENAI_KEEPALIVE", str(pool_size))),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30")),
+    )
+    h2_installed = importlib.util.find_spec("h2") is not None
+    http2 = _env_flag("OPENAI_HTTP2", h2_installed)
+    if http2 and not h2_installed:
+        llm_logger.warning("OPENAI_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        http2 = False
+    return {
+        "limits": limits,
+        "http2": bool(http2),
+        "timeout": httpx.Timeout(float(os.getenv("OPENAI_TIMEOUT", "120")), connect=10.0),
+    }
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(
+            **_client_options(),
+            event_hooks={"response": [get_scheduler().observe_response]},
+        )
+    return _sync_client
+
+
+def get_chat_model(**settings: Any) -> ChatOpenAI:
+    """
+    Return a shared ChatOpenAI for the given settings (model, temperature, ...).
+
+    All models share one pooled httpx.Client, so the redaction and evaluation calls
+    reuse keep-alive connections, and report rate-limit headers to the shared scheduler. Called inside a running event loop, models share an
+    httpx.AsyncClient owned by that loop. Safe to call from threads and tasks.
+    """
+    key = tuple(sorted(settings.items()))
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        if loop is None:
+            registry = _models
+        else:
+            registry = _loop_models.get(loop)
+            if registry is None:
+                registry = _loop_models[loop] = {}
+        model = registry.get(key)
+        if model is None:
+            options: dict[str, Any] = {"http_client": _get_sync_client()}
+            if loop is not None:
+                async_client = next((m.http_async_client for m in registry.values()), None)
+                options["http_async_client"] = async_client or httpx.AsyncClient(
+                    **_client_options(),
+                    event_hooks={"response": [get_scheduler().aobserve_response]},
+                )
+            model = ChatOpenAI(**settings, **options)
+            registry[key] = model
+            llm_logger.debug(f"Created pooled ChatOpenAI client for {settings}.")
+        return model
+
+
+# ---------- Usage ----------
+_usage_lock = threading.Lock()
+_usage_totals: dict[str, dict[str, int]] = {}
+
+
+def usage_from_message(message: Any) -> dict[str, int]:
+    """
+    Extract prompt, cached-prompt and completion token counts from an AIMessage's
+    usage metadata. Missing fields count as zero.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "prompt_tokens": int(usage.get("input_tokens") or 0),
+        "cached_tokens": int(details.get("cache_read") or 0),
+        "completion_tokens": int(usage.get("output_tokens") or 0),
+    }
+
+
+def record_usage(stage: str, usage: dict[str, int]) -> None:
+    """Add one call's token usage to the per-stage process totals and the current metrics span."""
+    metrics.add_usage(usage)
+    with _usage_lock:
+        totals = _usage_totals.setdefault(stage, {"calls": 0})
+        totals["calls"] += 1
+        for name, value in usage.items():
+            totals[name] = totals.get(name, 0) + value
+
+
+def usage_totals() -> dict[str, dict[str, int]]:
+    """Snapshot of token usage per stage since process start."""
+    with _usage_lock:
+        return {stage: dict(totals) for stage, totals in _usage_totals.items()}
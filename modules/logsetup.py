@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+from modules import metrics
+from modules.common import is_disabled
+
+# Loggers fed into the shared pipeline; module loggers are children of these.
+LOGGER_NAMES = ("resume_assesor", "redactor")
+
+_VALID_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(request_tag)s%(message)s"
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamp records with the request ID of the emitting context; it is gone once the record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = metrics.current_request_id()
+        record.request_id = request_id
+        record.request_tag = f"[{request_id}] " if request_id else ""
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without blocking: the message is rendered
+    here (cheap for f-strings), while tracebacks are formatted by the listener. When
+    the queue is full the record is dropped and counted rather than waited on.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                notice = logging.makeLogRecord({
+                    "name": "resume_assesor.logging",
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Log queue was full; {self.dropped} record(s) dropped.",
+                    "request_id": None,
+                    "request_tag": "",
+                })
+                self.queue.put_nowait(notice)
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Block rather than fail when the queue is full: stopping waits for the backlog anyway.
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request_id, message and any exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(_TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
+
+
+def _in_child_process() -> bool:
+    # A spawned child has always imported multiprocessing; don't import it just to ask.
+    multiprocessing = sys.modules.get("multiprocessing")
+    return multiprocessing is not None and multiprocessing.parent_process() is not None
+
+
+def setup_logging() -> None:
+    """
+    Route the resume_assesor and redactor loggers through one queue to a background
+    listener thread that owns the console and log file handlers, so a log call on a
+    worker thread or the event loop only enqueues the record. Idempotent.
+      LOG_LEVEL          DEBUG, INFO (default), WARNING, ERROR or CRITICAL
+      LOG_FILE           log file (default logs/resume_assesor.log); 0 disables file logging
+      LOG_MAX_BYTES      rotate the file at this size (default 10 MB)
+      LOG_BACKUPS        rotated files kept (default 5)
+      LOG_FORMAT         text (default) or json
+      LOG_QUEUE_SIZE     records buffered before new ones are dropped (default 10000)
+    In a multiprocessing child (such as a text extraction worker) only the console is
+    used: processes rotating the same file would lose or interleave lines.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        level = os.getenv("LOG_LEVEL", "INFO").upper()
+        if level not in _VALID_LEVELS:
+            level = "INFO"
+        formatter = _formatter(os.getenv("LOG_FORMAT", "text").strip().lower())
+
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(formatter)
+        handlers: list[logging.Handler] = [console_handler]
+        file_error: Optional[Exception] = None
+        log_file = os.getenv("LOG_FILE", "logs/resume_assesor.log").strip()
+        if not is_disabled(log_file) and not _in_child_process():
+            try:
+                Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+                file_handler = RotatingFileHandler(
+                    log_file,
+                    maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                    backupCount=int(os.getenv("LOG_BACKUPS", "5")),
+                    encoding="utf-8",
+                )
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+            except Exception as e:
+                file_error = e
+
+        log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        queue_handler = _NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(_RequestIdFilter())
+        for name in LOGGER_NAMES:
+            logger = logging.getLogger(name)
+            logger.setLevel(level)
+            logger.propagate = False
+            logger.handlers = [queue_handler]
+
+        _listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    if file_error is not None:
+        logging.getLogger("resume_assesor").warning(f"File logging disabled due to error: {file_error}")
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread (also run at interpreter exit)."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, TextIO
+
+mtr_logger = logging.getLogger("resume_assesor.metrics")
+
+# Upper bounds (seconds) of the stage latency histogram buckets.
+LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+# ---------- Prometheus-style registry ----------
+class _Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]) -> None:
+        self.name, self.help, self.labels = name, help, labels
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+
+class _Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values: dict[tuple[str, ...], list[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        row = self.values.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[-2] += 1
+        row[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, row in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), labels + (_number(bound),))} {_number(count)}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), labels + ('+Inf',))} {_number(row[-2])}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {row[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {_number(row[-2])}")
+        return lines
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+_lock = threading.Lock()
+_stage_seconds = _Histogram(
+    "resume_evaluator_stage_duration_seconds", "Wall time per pipeline stage.", ("stage", "status"), LATENCY_BUCKETS
+)
+_tokens = _Counter("resume_evaluator_llm_tokens_total", "LLM tokens by stage and kind (prompt, completion, cached).", ("stage", "kind"))
+_retries = _Counter("resume_evaluator_llm_retries_total", "LLM call attempts retried after a transient failure.", ("stage",))
+_queue_wait = _Counter(
+    "resume_evaluator_scheduler_wait_seconds_total", "Time LLM calls waited for rate-limit admission.", ("stage",)
+)
+_cache = _Counter("resume_evaluator_cache_lookups_total", "Result cache lookups by stage and outcome.", ("stage", "result"))
+_METRICS = (_stage_seconds, _tokens, _retries, _queue_wait, _cache)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        lines = [line for metric in _METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    """Write render_prometheus() to `path` atomically (for node-exporter textfile collectors)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+# ---------- Trace file ----------
+_trace_lock = threading.Lock()
+_trace_file: Optional[TextIO] = None
+_trace_path: Optional[str] = None
+
+
+def _write_trace(record: dict[str, Any]) -> None:
+    """Append a span to TRACE_FILE as one JSON line; no-op when TRACE_FILE is unset."""
+    global _trace_file, _trace_path
+    path = os.getenv("TRACE_FILE")
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False)
+    with _trace_lock:
+        try:
+            if _trace_file is None or _trace_path != path:
+                if _trace_file is not None:
+                    _trace_file.close()
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _trace_file, _trace_path = open(path, "a", encoding="utf-8"), path
+            _trace_file.write(line + "\n")
+            _trace_file.flush()
+        except OSError as e:
+            mtr_logger.warning(f"Could not write trace to {path}: {e}")
+
+
+# ---------- Spans ----------
+@dataclass
+class Span:
+    """One timed pipeline stage within a request. Updated by the code running inside it."""
+
+    stage: str
+    request_id: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    queue_wait_s: float = 0.0
+    cache_hit: Optional[bool] = None
+    status: str = "ok"
+    duration_s: float = 0.0
+
+    def record(self) -> dict[str, Any]:
+        return {
+            "ts": round(time.time(), 3),
+            "request_id": self.request_id,
+            "stage": self.stage,
+            "status": self.status,
+            "duration_ms": round(self.duration_s * 1000, 2),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "retries": self.retries,
+            "queue_wait_ms": round(self.queue_wait_s * 1000, 2),
+            "cache_hit": self.cache_hit,
+            **self.attributes,
+        }
+
+
+def current_request_id() -> Optional[str]:
+    """Request ID of the calling context, or None outside a request."""
+    return _request_id.get()
+
+
+@contextmanager
+def request(stage: str = "request", request_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Start a request: assign a request ID (propagated to asyncio tasks and to threads
+    started with copied contexts) and time the whole request as a span. Nested inside
+    another request, the outer ID is kept.
+    """
+    token = _request_id.set(request_id or _request_id.get() or uuid.uuid4().hex[:12])
+    try:
+        with span(stage, **attributes) as request_span:
+            yield request_span
+    finally:
+        _request_id.reset(token)
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Time a pipeline stage. On exit the span's duration, tokens, retries, scheduler wait
+    and cache outcome go to the metrics registry and, when TRACE_FILE is set, to the
+    JSONL trace. An exception marks the span as an error and is re-raised.
+    """
+    current = Span(stage, _request_id.get() or "-", dict(attributes))
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current.duration_s = time.perf_counter() - started
+        _current_span.reset(token)
+        _finish(current)
+
+
+def _finish(current: Span) -> None:
+    with _lock:
+        _stage_seconds.observe((current.stage, current.status), current.duration_s)
+        for kind in ("prompt", "completion", "cached"):
+            amount = getattr(current, f"{kind}_tokens")
+            if amount:
+                _tokens.inc((current.stage, kind), amount)
+        if current.retries:
+            _retries.inc((current.stage,), current.retries)
+        if current.queue_wait_s:
+            _queue_wait.inc((current.stage,), current.queue_wait_s)
+        if current.cache_hit is not None:
+            _cache.inc((current.stage, "hit" if current.cache_hit else "miss"))
+    _write_trace(current.record())
+
+
+# Called from the code inside a span; no-ops outside one.
+def add_usage(usage: dict[str, int]) -> None:
+    """Add a call's prompt/completion/cached token counts to the current span."""
+    current = _current_span.get()
+    if current is not None:
+        current.prompt_tokens += usage.get("prompt_tokens", 0)
+        current.completion_tokens += usage.get("completion_tokens", 0)
+        current.cached_tokens += usage.get("cached_tokens", 0)
+
+
+def add_retry() -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.retries += 1
+
+
+def add_queue_wait(seconds: float) -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.queue_wait_s += seconds
+
+
+def set_cache_hit(hit: bool) -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.cache_hit = hit
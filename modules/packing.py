@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Sequence
+
+if TYPE_CHECKING:
+    import tiktoken
+    from modules.prompts import CandidateEvaluation, EvaluationOutput
+
+pack_logger = logging.getLogger("resume_assesor.packing")
+
+# Tokens added around each resume by render_candidates (header line and separators).
+_CANDIDATE_OVERHEAD_TOKENS = 12
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Optional[tiktoken.Encoding]:
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; stay usable when that fails.
+        pack_logger.warning(f"tiktoken encoding unavailable ({e}); estimating tokens as characters / 4.")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Number of tokens `text` occupies for `model` (o200k_base for unknown models)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def render_candidates(batch: Sequence[tuple[str, str]]) -> str:
+    """Render (candidate_id, redacted resume) pairs under '### Candidate <id>' headers."""
+    return "\n\n".join(f"### Candidate {candidate_id}\n{resume}" for candidate_id, resume in batch)
+
+
+def pack_candidates(
+    candidates: Sequence[tuple[str, str]],
+    budget_tokens: int,
+    *,
+    overhead_tokens: int = 0,
+    max_candidates: int = 8,
+    model: str = "gpt-4o",
+) -> list[list[tuple[str, str]]]:
+    """
+    Greedily group (candidate_id, resume) pairs so each group's resumes plus
+    `overhead_tokens` (instructions and job description) fit in `budget_tokens`,
+    with at most `max_candidates` per group. A resume too large to share a call
+    is placed in a group on its own.
+    """
+    packs: list[list[tuple[str, str]]] = []
+    current: list[tuple[str, str]] = []
+    used = overhead_tokens
+    for candidate in candidates:
+        size = count_tokens(candidate[1], model) + _CANDIDATE_OVERHEAD_TOKENS
+        if current and (used + size > budget_tokens or len(current) >= max(1, max_candidates)):
+            packs.append(current)
+            current, used = [], overhead_tokens
+        current.append(candidate)
+        used += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+async def evaluate_packed(
+    batch: Sequence[tuple[str, str]],
+    invoke_batch: Callable[[Sequence[tuple[str, str]]], Awaitable[list[CandidateEvaluation]]],
+    invoke_single: Callable[[str], Awaitable[EvaluationOutput]],
+    on_result: Callable[[str, Optional[EvaluationOutput], Optional[Exception]], None],
+) -> None:
+    """
+    Evaluate a pack of candidates in one call. Candidates missing from a partial or
+    invalid response are split in half and retried; a lone leftover candidate falls
+    back to a regular single evaluation. `on_result` is called exactly once per
+    candidate with either its EvaluationOutput or the error that ended its attempts.
+    """
+    if len(batch) == 1:
+        candidate_id, resume = batch[0]
+        try:
+            on_result(candidate_id, await invoke_single(resume), None)
+        except Exception as e:
+            on_result(candidate_id, None, e)
+        return
+
+    pending = dict(batch)
+    try:
+        entries = await invoke_batch(batch)
+    except Exception as e:
+        pack_logger.warning(f"Packed evaluation of {len(batch)} candidates failed: {e}")
+        entries = []
+
+    for entry in entries:
+        if entry.candidate_id in pending:
+            del pending[entry.candidate_id]
+            on_result(entry.candidate_id, entry.to_output(), None)
+
+    if not pending:
+        return
+    leftover = [(candidate_id, resume) for candidate_id, resume in batch if candidate_id in pending]
+    pack_logger.info(f"Packed call returned {len(batch) - len(leftover)}/{len(batch)} candidates; retrying {len(leftover)}.")
+    middle = (len(leftover) + 1) // 2
+    await asyncio.gather(*(
+        evaluate_packed(half, invoke_batch, invoke_single, on_result)
+        for half in (leftover[:middle], leftover[middle:])
+        if half
+    ))
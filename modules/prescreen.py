@@ -0,0 +1,284 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from modules.common import is_disabled
+
+ps_logger = logging.getLogger("resume_assesor.prescreen")
+
+# Words kept together: "c++", "c#", "node.js", "ci/cd" -> "ci", "cd"; "scikit-learn".
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+_SHORT_TOKENS = frozenset({"c", "r"})
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by for from has have in into is it its of on or our
+    such that the their this to was were will with we you your they he she his her them
+    who which what when where while than then there these those also any all can may
+    must should would could about over under more most other some per via using used
+    years year experience work working team teams role redacted
+    """.split()
+)
+# Pending documents become a sorted segment every _SEGMENT_DOCS additions, and
+# segments are merged into one once there are more than _MAX_SEGMENTS. Merging sorted
+# runs is cheap for the stable sort, so indexing cost stays linear in practice.
+_SEGMENT_DOCS = 2048
+_MAX_SEGMENTS = 32
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms without stopwords; single characters only for languages like C and R."""
+    return [
+        token
+        for token in _TOKEN_RE.findall(text.lower())
+        if (len(token) > 1 or token in _SHORT_TOKENS) and token not in _STOPWORDS
+    ]
+
+
+class LexicalIndex:
+    """
+    Incremental BM25 index over resume texts, held as sorted (term, doc, tf) postings
+    in NumPy arrays.
+
+    Documents are keyed (e.g. by resume path) and fingerprinted, so re-adding an
+    unchanged document is a no-op and a changed one replaces its old version. New
+    documents land in small segments that are merged lazily; a query scores all
+    segments with vectorised lookups, so it stays well under a second at ~100k
+    documents. `save` compacts and writes everything to one .npz file that `load`
+    reads back without re-tokenising.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None, k1: float = 1.5, b: float = 0.75) -> None:
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._vocab: dict[str, int] = {}
+        self._keys: list[str] = []
+        self._digests: list[str] = []
+        self._key_index: dict[str, int] = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._segments: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return int(self._alive[:len(self._keys)].sum())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_index
+
+    # ---------- Updates ----------
+    def add(self, key: str, text: str) -> bool:
+        """Index `text` under `key`. Returns False when that exact text is already indexed."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        counts = Counter(tokenize(text))
+        with self._lock:
+            previous = self._key_index.get(key)
+            if previous is not None:
+                if self._digests[previous] == digest:
+                    return False
+                self._alive[previous] = False
+
+            doc = len(self._keys)
+            self._keys.append(key)
+            self._digests.append(digest)
+            self._key_index[key] = doc
+            term_ids = np.fromiter(
+                (self._vocab.setdefault(term, len(self._vocab)) for term in counts), dtype=np.int32, count=len(counts)
+            )
+            tfs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            self._pending.append((term_ids, np.full(len(counts), doc, dtype=np.int32), tfs))
+            if doc >= len(self._lengths):
+                # Grow geometrically so adding n documents costs O(n) copies.
+                capacity = max(1024, 2 * len(self._lengths))
+                self._lengths = np.resize(self._lengths, capacity)
+                self._alive = np.resize(self._alive, capacity)
+            self._lengths[doc] = sum(counts.values())
+            self._alive[doc] = True
+            self._dirty = True
+            if len(self._pending) >= _SEGMENT_DOCS:
+                self._flush()
+            return True
+
+    def add_many(self, documents: Iterable[tuple[str, str]]) -> int:
+        """Index (key, text) pairs; returns how many were new or changed."""
+        return sum(self.add(key, text) for key, text in documents)
+
+    def _flush(self) -> None:
+        """Turn pending documents into a sorted segment; merge segments when there are many."""
+        if self._pending:
+            terms, docs, tfs = (np.concatenate(parts) for parts in zip(*self._pending))
+            order = np.argsort(terms, kind="stable")
+            self._segments.append((terms[order], docs[order], tfs[order]))
+            self._pending = []
+        if len(self._segments) > _MAX_SEGMENTS:
+            self._merge()
+
+    def _merge(self) -> None:
+        if len(self._segments) <= 1:
+            return
+        terms, docs, tfs = (np.concatenate(parts) for parts in zip(*self._segments))
+        order = np.argsort(terms, kind="stable")
+        self._segments = [(terms[order], docs[order], tfs[order])]
+
+    def _compact(self) -> None:
+        """Drop replaced documents and renumber the rest."""
+        n = len(self._keys)
+        self._lengths, self._alive = self._lengths[:n], self._alive[:n]
+        if self._alive.all():
+            return
+        self._merge()
+        remap = np.cumsum(self._alive, dtype=np.int64) - 1
+        if self._segments:
+            terms, docs, tfs = self._segments[0]
+            keep = self._alive[docs]
+            self._segments = [(terms[keep], remap[docs[keep]].astype(np.int32), tfs[keep])]
+        alive = np.flatnonzero(self._alive)
+        self._keys = [self._keys[i] for i in alive]
+        self._digests = [self._digests[i] for i in alive]
+        self._key_index = {key: i for i, key in enumerate(self._keys)}
+        self._lengths = self._lengths[alive]
+        self._alive = np.ones(len(self._keys), dtype=bool)
+
+    # ---------- Queries ----------
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document slot against `query` (0 for replaced documents)."""
+        with self._lock:
+            self._flush()
+            n = len(self._keys)
+            scores = np.zeros(n, dtype=np.float64)
+            alive, lengths = self._alive[:n], self._lengths[:n]
+            live = int(alive.sum())
+            if not live:
+                return scores
+            query_ids = np.array(
+                sorted({self._vocab[term] for term in tokenize(query) if term in self._vocab}), dtype=np.int32
+            )
+            if not len(query_ids):
+                return scores
+            avg_length = float(lengths[alive].mean()) or 1.0
+            norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+
+            bounds = [
+                (np.searchsorted(terms, query_ids, "left"), np.searchsorted(terms, query_ids, "right"))
+                for terms, _, _ in self._segments
+            ]
+            doc_parts: list[np.ndarray] = []
+            weight_parts: list[np.ndarray] = []
+            for q in range(len(query_ids)):
+                docs = np.concatenate([seg[1][lo[q]:hi[q]] for seg, (lo, hi) in zip(self._segments, bounds)])
+                tfs = np.concatenate([seg[2][lo[q]:hi[q]] for seg, (lo, hi) in zip(self._segments, bounds)])
+                mask = alive[docs]
+                docs, tfs = docs[mask], tfs[mask]
+                if not len(docs):
+                    continue
+                idf = np.log1p((live - len(docs) + 0.5) / (len(docs) + 0.5))
+                doc_parts.append(docs)
+                weight_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm[docs]))
+            if doc_parts:
+                scores += np.bincount(np.concatenate(doc_parts), np.concatenate(weight_parts), minlength=n)
+            return scores
+
+    def score(self, query: str, keys: Sequence[str]) -> np.ndarray:
+        """BM25 scores of the given (indexed) keys against `query`, in the same order."""
+        scores = self.scores(query)
+        return scores[[self._key_index[key] for key in keys]] if keys else np.zeros(0)
+
+    # ---------- Persistence ----------
+    def save(self, path: Optional[str | Path] = None) -> None:
+        """Compact and write the index atomically to `path` (default: the index's own path)."""
+        path = Path(path) if path else self.path
+        if path is None:
+            return
+        with self._lock:
+            self._flush()
+            self._compact()
+            self._merge()
+            if self._segments:
+                terms, docs, tfs = self._segments[0]
+            else:
+                terms, docs, tfs = np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.float32)
+            vocab = np.array(sorted(self._vocab, key=self._vocab.__getitem__), dtype=str)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as fh:
+                np.savez(
+                    fh,
+                    vocab=vocab,
+                    keys=np.array(self._keys, dtype=str),
+                    digests=np.array(self._digests, dtype=str),
+                    lengths=self._lengths,
+                    terms=terms,
+                    docs=docs,
+                    tfs=tfs,
+                    params=np.array([self.k1, self.b]),
+                )
+            os.replace(tmp, path)
+            self._dirty = False
+        ps_logger.info(f"Saved lexical index with {len(self._keys)} document(s) to {path}.")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LexicalIndex":
+        """Open the index stored at `path`, or an empty one bound to that path if none exists."""
+        index = cls(path)
+        if not index.path.exists():
+            return index
+        try:
+            with np.load(index.path, allow_pickle=False) as data:
+                index.k1, index.b = (float(v) for v in data["params"])
+                index._vocab = {term: i for i, term in enumerate(data["vocab"].tolist())}
+                index._keys = data["keys"].tolist()
+                index._digests = data["digests"].tolist()
+                index._lengths = data["lengths"].astype(np.float32)
+                index._segments = [(data["terms"], data["docs"], data["tfs"])] if len(data["terms"]) else []
+        except Exception as e:
+            ps_logger.warning(f"Could not load lexical index {index.path} ({e}); starting a new one.")
+            return cls(path)
+        index._key_index = {key: i for i, key in enumerate(index._keys)}
+        index._alive = np.ones(len(index._keys), dtype=bool)
+        return index
+
+    def save_if_changed(self) -> None:
+        if self._dirty:
+            self.save()
+
+
+def index_from_env(default_path: str = ".cache/prescreen.npz") -> LexicalIndex:
+    """
+    Lexical index configured from the environment:
+      PRESCREEN_INDEX   path of the persisted index (default .cache/prescreen.npz);
+                        0 keeps the index in memory for this run only
+    """
+    path = os.getenv("PRESCREEN_INDEX", default_path).strip()
+    if is_disabled(path):
+        return LexicalIndex()
+    return LexicalIndex.load(path)
+
+
+def shortlist(scores: np.ndarray, top_k: int = 0, min_score: float = 0.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select candidates from their lexical scores. `top_k` keeps the K best (0: no
+    limit); `min_score` keeps those scoring at least that fraction of the best score
+    (0-1; 0: no floor). With both set a candidate must pass both.
+    Returns (selected mask, relative scores, 1-based ranks).
+    """
+    best = float(scores.max()) if len(scores) else 0.0
+    relative = scores / best if best > 0 else np.zeros_like(scores)
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[order] = np.arange(1, len(scores) + 1)
+
+    selected = np.ones(len(scores), dtype=bool)
+    if top_k > 0:
+        selected &= ranks <= top_k
+    if min_score > 0:
+        selected &= relative >= min_score
+    return selected, relative, ranks
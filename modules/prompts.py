@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import os
+import json
+import hashlib
+from functools import lru_cache
 from textwrap import dedent
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-from dotenv import load_dotenv
-from langchain.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# langchain is imported by the prompt builders on first use; prompts are built once
+# per process (per layout) and reused.
+if TYPE_CHECKING:
+    from langchain.prompts import ChatPromptTemplate
 
 if os.environ.get("LOAD_DOTENV", "").lower() in {"1", "true", "yes"}:
+    from dotenv import load_dotenv
     load_dotenv()
 
 __all__ = [
@@ -16,8 +23,23 @@ __all__ = [
     "Categories",
     "Evaluation",
     "EvaluationOutput",
+    "ModelEvaluationOutput",
+    "CATEGORY_WEIGHTS",
+    "FIT_THRESHOLDS",
+    "compute_rollups",
     "resume_eveluator_prompt",
+    "evaluator_prompt_version",
+    "CandidateEvaluation",
+    "BatchEvaluationOutput",
+    "resume_batch_evaluator_prompt",
+    "batch_evaluator_prompt_version",
+    "JobDigest",
+    "jd_digest_prompt",
+    "jd_digest_prompt_version",
     "redaction_prompt",
+    "PIISpan",
+    "RedactionSpans",
+    "redaction_spans_prompt",
 ]
 
 
@@ -37,16 +59,74 @@ class Categories(BaseModel):
     Soft_Skills: CategoryScore
 
 
+# Category weights (percent) for the overall rollups, in Categories field order.
+CATEGORY_WEIGHTS: dict[str, float] = {
+    "Technical_Skills": 30,
+    "Domain_Knowledge": 20,
+    "Experience_Level": 20,
+    "Tools_and_Technologies": 15,
+    "Education_and_Certifications": 10,
+    "Soft_Skills": 5,
+}
+
+# Minimum overall_match_score for each fit class; anything lower is a Weak Fit.
+FIT_THRESHOLDS: dict[str, float] = {
+    "Strong Fit": 85,
+    "Moderate Fit": 50,
+}
+
+
+def compute_rollups(categories: Categories) -> dict[str, float | str]:
+    """
+    Weighted overall_match_score and cumulative_confidence (rounded to 2 decimal
+    points) and the fit_classification derived from them.
+    """
+    total = sum(CATEGORY_WEIGHTS.values())
+    scores = {name: getattr(categories, name) for name in CATEGORY_WEIGHTS}
+    overall = round(sum(CATEGORY_WEIGHTS[n] * s.score for n, s in scores.items()) / total, 2)
+    confidence = round(sum(CATEGORY_WEIGHTS[n] * s.confidence for n, s in scores.items()) / total, 2)
+    fit = next((label for label, floor in FIT_THRESHOLDS.items() if overall >= floor), "Weak Fit")
+    return {
+        "overall_match_score": overall,
+        "cumulative_confidence": confidence,
+        "fit_classification": fit,
+    }
+
+
 class Evaluation(BaseModel):
-    """Overall evaluation rollups."""
+    """
+    Overall evaluation rollups. The rollups are computed locally from the
+    categories when omitted and must agree with them when supplied.
+    """
     categories: Categories
     overall_match_score: float = Field(..., ge=0, le=100)
     cumulative_confidence: float = Field(..., ge=0, le=100)
     fit_classification: Literal["Strong Fit", "Moderate Fit", "Weak Fit"]
 
+    @model_validator(mode="before")
+    @classmethod
+    def _fill_rollups(cls, data: Any) -> Any:
+        if isinstance(data, dict) and "categories" in data and "overall_match_score" not in data:
+            categories = data["categories"]
+            if not isinstance(categories, Categories):
+                categories = Categories.model_validate(categories)
+            data = {**data, "categories": categories, **compute_rollups(categories)}
+        return data
+
+    @model_validator(mode="after")
+    def _check_rollups(self) -> "Evaluation":
+        expected = compute_rollups(self.categories)
+        if (
+            abs(self.overall_match_score - expected["overall_match_score"]) > 0.01
+            or abs(self.cumulative_confidence - expected["cumulative_confidence"]) > 0.01
+            or self.fit_classification != expected["fit_classification"]
+        ):
+            raise ValueError(f"Rollups do not match the category scores; expected {expected}")
+        return self
+
 
 class EvaluationOutput(BaseModel):
-    """Final LLM output contract."""
+    """Final evaluation result: category scores with local rollups, plus the summary."""
     evaluation: Evaluation
     summary: str = Field(
         ...,
@@ -54,23 +134,110 @@ class EvaluationOutput(BaseModel):
     )
 
 
-def resume_eveluator_prompt() -> ChatPromptTemplate:
+class ModelEvaluationOutput(BaseModel):
+    """LLM output contract: category scores and summary only."""
+    categories: Categories
+    summary: str = Field(
+        ...,
+        description="1–3 sentence summary explaining key strengths, weaknesses, and overall alignment",
+    )
+
+    def to_output(self) -> EvaluationOutput:
+        """Attach locally computed rollups."""
+        return EvaluationOutput(evaluation=Evaluation(categories=self.categories), summary=self.summary)
+
+
+class CandidateEvaluation(ModelEvaluationOutput):
+    """One candidate's result within a packed multi-candidate call."""
+    candidate_id: str = Field(..., description="The candidate ID exactly as given in the input")
+
+
+class BatchEvaluationOutput(BaseModel):
+    """Packed LLM output contract: one entry per candidate."""
+    candidates: list[CandidateEvaluation]
+
+
+class JobDigest(BaseModel):
     """
-    Build the resume evaluator prompt.
-    Returns a ChatPromptTemplate that instructs the model to strictly output JSON
-    conforming to the EvaluationOutput schema with the exact keys as defined.
+    Job description condensed once per posting: the structure check plus only the
+    requirements that affect scoring, grouped like the evaluation categories.
     """
-    weights_section = dedent(
-        """
-        Use these exact JSON keys and weights:
-        - Technical_Skills (30%)
-        - Domain_Knowledge (20%)
-        - Experience_Level (20%)
-        - Tools_and_Technologies (15%)
-        - Education_and_Certifications (10%)
-        - Soft_Skills (5%)
-        """
-    ).strip()
+    is_valid_job_description: bool = Field(
+        ...,
+        description="True when the input is a job posting with a job title and responsibilities or required qualifications",
+    )
+    validation_issue: str = Field(..., description="Why the input is not a usable job description; empty when valid")
+    job_title: str
+    responsibilities: list[str] = Field(..., description="Role responsibilities and duties, one short item each")
+    technical_skills: list[str] = Field(..., description="Required technical skills")
+    domain_knowledge: list[str] = Field(..., description="Required industry or domain knowledge")
+    experience_level: list[str] = Field(..., description="Required years, seniority or kinds of experience")
+    tools_and_technologies: list[str] = Field(..., description="Required tools, platforms and technologies")
+    education_and_certifications: list[str] = Field(..., description="Required degrees and certifications")
+    soft_skills: list[str] = Field(..., description="Required soft skills")
+    preferred_qualifications: list[str] = Field(..., description="Nice-to-have qualifications of any category")
+
+    def render(self) -> str:
+        """Compact plain-text form passed to the evaluator in place of the raw posting."""
+        sections = [
+            ("Responsibilities", self.responsibilities),
+            ("Required Technical Skills", self.technical_skills),
+            ("Required Domain Knowledge", self.domain_knowledge),
+            ("Required Experience", self.experience_level),
+            ("Required Tools and Technologies", self.tools_and_technologies),
+            ("Required Education and Certifications", self.education_and_certifications),
+            ("Required Soft Skills", self.soft_skills),
+            ("Preferred Qualifications (not required)", self.preferred_qualifications),
+        ]
+        lines = [f"Job Title: {self.job_title}"]
+        for heading, items in sections:
+            if items:
+                lines.append(f"{heading}:")
+                lines.extend(f"- {item}" for item in items)
+        return "\n".join(lines)
+
+
+class PIISpan(BaseModel):
+    """A single PII occurrence reported by the span-based redactor."""
+    text: str = Field(..., description="The PII exactly as it appears in the input, character for character")
+    category: Literal["name", "email", "phone", "url", "handle", "address", "demographic"]
+    occurrence: int = Field(
+        ...,
+        ge=0,
+        description="1-based index of the occurrence of `text` to redact; 0 redacts every occurrence",
+    )
+
+
+class RedactionSpans(BaseModel):
+    """Span-based redaction output contract."""
+    spans: list[PIISpan]
+
+
+def _evaluator_instructions(jd_digest: bool = False) -> str:
+    """
+    Private builder for the static evaluator instructions (no input variables).
+    With `jd_digest` the job description arrives as an already validated JobDigest,
+    so the model is told not to re-check its structure.
+    """
+    # Weights and rollups are applied locally (see Evaluation), so the model only sees the keys.
+    keys_section = "Use these exact JSON keys:\n" + "\n".join(f"- {name}" for name in CATEGORY_WEIGHTS)
+    if jd_digest:
+        jd_lines = [
+            "2. The job description has already been validated and condensed into a requirements digest (job title, "
+            "responsibilities, required qualifications by category and preferred qualifications). Do NOT re-validate "
+            "its structure; treat the digest as the complete set of job requirements.",
+        ]
+    else:
+        jd_lines = [
+            "2. Secondly, validate the structure of the job description. A valid job posting should typically include:",
+            "   - Job Title",
+            "   - Company Overview or Description",
+            "   - Role Responsibilities and Duties",
+            "   - Required Skills and Qualifications",
+            "   - Optional: Preferred Skills, Location, Employment Type, Benefits, etc.",
+        ]
+    # Joined with the indentation the template lines keep after dedent.
+    jd_step = "\n        ".join(jd_lines)
 
     template = dedent(
         f"""
@@ -88,12 +255,7 @@ def resume_eveluator_prompt() -> ChatPromptTemplate:
            - Skills
            - Optional: Certifications, Projects, Awards, etc.
         
-        2. Secondly, validate the structure of the job description. A valid job posting should typically include:
-           - Job Title
-           - Company Overview or Description
-           - Role Responsibilities and Duties
-           - Required Skills and Qualifications
-           - Optional: Preferred Skills, Location, Employment Type, Benefits, etc.
+        {jd_step}
         
         Guardrails:
         - Do NOT invent, infer, or assume missing information.
@@ -105,7 +267,7 @@ def resume_eveluator_prompt() -> ChatPromptTemplate:
         
         If both are valid, set incorrect_input = FALSE and continue to comparison.
         
-        {weights_section}
+        {keys_section}
         
         For each category provide:
         - score: 0–100 (100 = perfect alignment; 50 = partial; 0 = no evidence)
@@ -114,62 +276,206 @@ def resume_eveluator_prompt() -> ChatPromptTemplate:
         Definition of score: A metric used to quantify how closely an individual's skills, experience, and qualifications match the requirements of a specific job role.
         Definition of confidence: The degree of certainty or reliability that can be placed in the evaluation, based on clarity, completeness, and quality of the resume and job posting.
         
-        Then compute:
-        - overall_match_score:
-            overall_match_score = (Sum of individual scores for each category / number of categories), rounded to 2 decimal points
-        - cumulative_confidence:
-            cumulative_confidence = (Sum of individual confidence for each category / number of categories), rounded to 2 decimal points
-            If incorrect_input = TRUE, then set cumulative_confidence = 100
-        - fit_classification: one of "Strong Fit", "Moderate Fit", "Weak Fit"
-            Strong Fit = overall_match_score >= 85
-            Moderate Fit = 50 <= overall_match_score < 85
-            Weak Fit = overall_match_score < 50
-        
         Provide a 1–3 sentence summary of compatibilities and incompatibilities between the resume and the position description.
         
         Output requirements:
         - Output ONLY valid JSON matching this structure with these exact keys:
-          evaluation.categories.Technical_Skills.score
-          evaluation.categories.Technical_Skills.confidence
-          evaluation.categories.Domain_Knowledge.score
-          evaluation.categories.Domain_Knowledge.confidence
-          evaluation.categories.Experience_Level.score
-          evaluation.categories.Experience_Level.confidence
-          evaluation.categories.Tools_and_Technologies.score
-          evaluation.categories.Tools_and_Technologies.confidence
-          evaluation.categories.Education_and_Certifications.score
-          evaluation.categories.Education_and_Certifications.confidence
-          evaluation.categories.Soft_Skills.score
-          evaluation.categories.Soft_Skills.confidence
-          evaluation.overall_match_score
-          evaluation.cumulative_confidence
-          evaluation.fit_classification
+          categories.Technical_Skills.score
+          categories.Technical_Skills.confidence
+          categories.Domain_Knowledge.score
+          categories.Domain_Knowledge.confidence
+          categories.Experience_Level.score
+          categories.Experience_Level.confidence
+          categories.Tools_and_Technologies.score
+          categories.Tools_and_Technologies.confidence
+          categories.Education_and_Certifications.score
+          categories.Education_and_Certifications.confidence
+          categories.Soft_Skills.score
+          categories.Soft_Skills.confidence
           summary
         - Do not include any additional fields, comments, or explanations.
         - The JSON must be syntactically valid and must not include escape characters.
-        
-        Candidate Resume:
-        {{resume}}
-        
-        Job Description:
-        {{job_description}}
         """
     ).strip()
 
-    return ChatPromptTemplate.from_template(template)
+    return template
 
 
-def _redaction_system_instructions() -> str:
+def _evaluator_template(jd_digest: bool = False) -> str:
     """
-    Private builder for safe, deterministic PII redaction instructions.
+    Private builder for the single-message ("inline") evaluator template.
+    """
+    # Matches the indentation the instructions keep after dedent, so the text is unchanged.
+    return (
+        f"{_evaluator_instructions(jd_digest)}\n\n"
+        "        Candidate Resume:\n        {resume}\n\n"
+        "        Job Description:\n        {job_description}"
+    )
+
+
+_PROMPT_LAYOUTS = {"inline", "cached"}
+
+
+def _prompt_layout(layout: str | None) -> str:
+    layout = (layout or os.getenv("PROMPT_LAYOUT", "inline")).strip().lower()
+    return layout if layout in _PROMPT_LAYOUTS else "inline"
+
+
+def resume_eveluator_prompt(layout: str | None = None, jd_digest: bool = False) -> ChatPromptTemplate:
+    """
+    Build the resume evaluator prompt.
+    Returns a ChatPromptTemplate that instructs the model to strictly output JSON
+    conforming to the ModelEvaluationOutput schema with the exact keys as defined.
+
+    layout (default: PROMPT_LAYOUT env, else "inline"):
+      inline - one message: instructions, then the resume, then the job description
+      cached - static instructions as the system message, then the job description,
+               then the resume, so calls for the same position share a long prefix
+               that the provider can serve from its prompt cache
+
+    jd_digest: the job description is a JobDigest rendering (see modules/jd_digest.py)
+    rather than the raw posting, and is not re-validated.
+    """
+    return _build_evaluator_prompt(_prompt_layout(layout), jd_digest)
+
+
+@lru_cache(maxsize=None)
+def _build_evaluator_prompt(layout: str, jd_digest: bool = False) -> ChatPromptTemplate:
+    from langchain.prompts import ChatPromptTemplate
+
+    if layout == "cached":
+        return ChatPromptTemplate.from_messages(
+            [
+                ("system", _evaluator_instructions(jd_digest)),
+                ("human", "Job Description:\n{job_description}\n\nCandidate Resume:\n{resume}"),
+            ]
+        )
+    return ChatPromptTemplate.from_template(_evaluator_template(jd_digest))
+
+
+def _batch_evaluator_addendum() -> str:
+    """
+    Private builder for the extra instructions used when several candidates share one call.
+    """
+    return dedent(
+        """
+        Multiple candidates:
+        - The input contains one job description followed by several candidate resumes, each introduced by a line "### Candidate <candidate_id>".
+        - Evaluate every candidate independently against the job description; never compare candidates with each other or let one resume influence another's scores.
+        - Return exactly one entry per candidate in "candidates", with "candidate_id" copied exactly from its header and "categories" and "summary" following the structure above.
+        """
+    ).strip()
+
+
+@lru_cache(maxsize=None)
+def resume_batch_evaluator_prompt(jd_digest: bool = False) -> ChatPromptTemplate:
+    """
+    Build the packed multi-candidate evaluator prompt; pair it with BatchEvaluationOutput.
+    Takes 'job_description' and 'candidates' (resumes rendered under candidate headers).
+    `jd_digest` as for resume_eveluator_prompt.
+    """
+    from langchain.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", f"{_evaluator_instructions(jd_digest)}\n\n{_batch_evaluator_addendum()}"),
+            ("human", "Job Description:\n{job_description}\n\nCandidates:\n{candidates}"),
+        ]
+    )
+
+
+def evaluator_prompt_version(layout: str | None = None, jd_digest: bool = False) -> str:
+    """
+    Fingerprint of the evaluator prompt (for the given layout and JD form), the output
+    schemas and the rollup weights and thresholds. Changes whenever any of them does,
+    which invalidates cached evaluations.
+    """
+    return _evaluator_prompt_version(_prompt_layout(layout), jd_digest)
+
+
+@lru_cache(maxsize=None)
+def _evaluator_prompt_version(layout: str, jd_digest: bool = False) -> str:
+    digest = hashlib.sha256()
+    for message in _build_evaluator_prompt(layout, jd_digest).messages:
+        digest.update(message.prompt.template.encode("utf-8"))
+    digest.update(json.dumps(ModelEvaluationOutput.model_json_schema(), sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(EvaluationOutput.model_json_schema(), sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps([CATEGORY_WEIGHTS, FIT_THRESHOLDS]).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def batch_evaluator_prompt_version(jd_digest: bool = False) -> str:
+    """
+    Fingerprint of the packed evaluator prompt, its output schemas and the rollup
+    weights and thresholds; keys cached results of packed calls.
+    """
+    digest = hashlib.sha256()
+    for message in resume_batch_evaluator_prompt(jd_digest).messages:
+        digest.update(message.prompt.template.encode("utf-8"))
+    digest.update(json.dumps(BatchEvaluationOutput.model_json_schema(), sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(EvaluationOutput.model_json_schema(), sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps([CATEGORY_WEIGHTS, FIT_THRESHOLDS]).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _jd_digest_instructions() -> str:
+    """
+    Private builder for the job description digest instructions.
+    """
+    return dedent(
+        """
+        You prepare job descriptions for automated resume screening. The output replaces the job description in every later candidate evaluation, so it must keep everything a candidate is scored against and nothing else.
+
+        1. Validate the structure of the job description. A valid job posting includes at least a job title and either role responsibilities or required skills and qualifications. If it does not, set is_valid_job_description = false, explain the problem in validation_issue and leave the other fields empty.
+
+        2. Otherwise set is_valid_job_description = true, leave validation_issue empty and condense the posting:
+           - job_title: the job title as written.
+           - responsibilities: the role's duties, one short item each.
+           - technical_skills, domain_knowledge, experience_level, tools_and_technologies, education_and_certifications, soft_skills: the REQUIRED qualifications of each kind.
+           - preferred_qualifications: qualifications marked as preferred, desirable, a plus or nice to have.
+
+        Rules:
+        - Drop content that does not affect scoring: company overview and history, mission statements, benefits, compensation, perks, equal-opportunity and accommodation statements, application instructions and legal boilerplate.
+        - Do NOT invent, infer, or generalise requirements; keep the posting's own terms, numbers and levels (e.g. "5+ years of Python", "AWS Solutions Architect certification").
+        - Each item is a short phrase, not a sentence; list every distinct requirement once.
+        - Use an empty list for a category the posting does not mention.
+        """
+    ).strip()
+
+
+@lru_cache(maxsize=None)
+def jd_digest_prompt() -> ChatPromptTemplate:
+    """
+    Build the job description digest prompt; pair it with JobDigest.
+    Takes 'job_description' (the raw posting).
+    """
+    from langchain.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", _jd_digest_instructions()),
+            ("human", "Job Description:\n{job_description}"),
+        ]
+    )
+
+
+@lru_cache(maxsize=None)
+def jd_digest_prompt_version() -> str:
+    """Fingerprint of the digest prompt and the JobDigest schema; changes invalidate cached digests."""
+    digest = hashlib.sha256()
+    for message in jd_digest_prompt().messages:
+        digest.update(message.prompt.template.encode("utf-8"))
+    digest.update(json.dumps(JobDigest.model_json_schema(), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _redaction_rules() -> str:
+    """
+    Private builder for the PII categories shared by both redaction modes.
     """
     return dedent(
         """
-        You are a meticulous and rule-driven PII (Personally Identifiable Information) redactor.
-        
-        Task:
-        Replace any personally identifiable information (PII) with the placeholder REDACTION_TOKEN.
-        
         PII Categories to Redact (non-exhaustive, but strictly defined):
         - Person names (e.g., "John Smith")
         - Email addresses (e.g., "name@example.com")
@@ -183,6 +489,22 @@ def _redaction_system_instructions() -> str:
         - Company names (e.g. "Acme Corp")
         - Technologies, industries, and generic project names (e.g. "Python", "Cloud migration")
         - High-level locations not tied to a person (e.g., "Global team", "Headquartered in Berlin")
+        """
+    ).strip()
+
+
+def _redaction_system_instructions() -> str:
+    """
+    Private builder for safe, deterministic PII redaction instructions.
+    """
+    return dedent(
+        """
+        You are a meticulous and rule-driven PII (Personally Identifiable Information) redactor.
+        
+        Task:
+        Replace any personally identifiable information (PII) with the placeholder REDACTION_TOKEN.
+        
+        {rules}
         
         Formatting and Output Rules:
         - Preserve all original whitespace, line breaks, punctuation, and non-PII content exactly.
@@ -214,17 +536,72 @@ def _redaction_system_instructions() -> str:
         
         Return only the redacted text, with no explanations or commentary.
         """
-    ).strip()
+    ).strip().format(rules=_redaction_rules())
 
 
+def _redaction_spans_instructions() -> str:
+    """
+    Private builder for span-based PII detection instructions. The model lists
+    PII spans instead of re-emitting the text; replacement happens locally.
+    """
+    return dedent(
+        """
+        You are a meticulous and rule-driven PII (Personally Identifiable Information) detector.
+        
+        Task:
+        List every piece of personally identifiable information (PII) in the input. Do not rewrite or repeat the input.
+        
+        {rules}
+        
+        Span Rules:
+        - text: copy the PII exactly as it appears in the input, including case, punctuation and internal whitespace.
+        - category: one of name, email, phone, url, handle, address, demographic.
+        - occurrence: 0 if every occurrence of that exact text is PII; otherwise the 1-based position of the occurrence that is PII.
+        - Report complete occurrences only; do not report partial matches.
+        - The placeholder REDACTION_TOKEN is already redacted; never report it.
+        - If ambiguity exists (e.g. "John" used as a product name), do not report it unless clearly used as a personal identifier.
+        - If there is no PII, return an empty list of spans.
+        
+        Example:
+        
+        Input:
+        "John Doe works as a Data Analyst at TechCorp. He lives at 12 Orchard Road, Sydney."
+        
+        Spans:
+        - text "John Doe", category name, occurrence 0
+        - text "12 Orchard Road", category address, occurrence 0
+        - text "Sydney", category address, occurrence 0
+        """
+    ).strip().format(rules=_redaction_rules())
+
+
+@lru_cache(maxsize=None)
 def redaction_prompt() -> ChatPromptTemplate:
     """
     Build the PII redaction prompt.
     Returns a ChatPromptTemplate that takes a single input variable: 'input'.
     """
+    from langchain.prompts import ChatPromptTemplate
+
     return ChatPromptTemplate.from_messages(
         [
             ("system", _redaction_system_instructions()),
             ("human", "{input}"),
         ]
     )
+
+
+@lru_cache(maxsize=None)
+def redaction_spans_prompt() -> ChatPromptTemplate:
+    """
+    Build the span-based PII redaction prompt; pair it with RedactionSpans structured output.
+    Returns a ChatPromptTemplate that takes a single input variable: 'input'.
+    """
+    from langchain.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", _redaction_spans_instructions()),
+            ("human", "{input}"),
+        ]
+    )
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Sequence, TypeVar
+
+import openai
+
+from modules import metrics
+from modules.packing import count_tokens
+
+if TYPE_CHECKING:
+    import httpx
+
+rl_logger = logging.getLogger("resume_assesor.ratelimit")
+
+T = TypeVar("T")
+
+# Errors worth another attempt; RateLimitError additionally throttles the scheduler.
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_POLL_INTERVAL = 0.05
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset durations ('1s', '6m0s', '20ms') or plain seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _retry_after(headers: Any) -> Optional[float]:
+    if headers is None:
+        return None
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000
+        except ValueError:
+            pass
+    return _parse_duration(headers.get("retry-after"))
+
+
+class _Bucket:
+    """Token bucket refilled continuously at capacity-per-minute. Capacity 0 means unlimited."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        if self.capacity <= 0:
+            return 0.0
+        # A request larger than the whole bucket is admitted once the bucket is full.
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.level -= amount
+
+
+class RateLimitScheduler:
+    """
+    Shared admission control for LLM requests.
+
+    Requests are admitted against request-per-minute and token-per-minute buckets
+    (token cost estimated up front) and an AIMD concurrency limit: every success
+    raises the limit by 1/limit, every 429 halves it. Rate-limit response headers
+    re-synchronise the buckets with the provider, learn the limits when they were not
+    configured, and `retry-after` pauses all admissions. Transient failures are
+    retried here; the OpenAI client's own retries should be disabled.
+    Usable from threads (run) and asyncio tasks (arun) at the same time.
+    """
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_attempts: int = 6,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._requests = _Bucket(rpm)
+        self._tokens = _Bucket(tpm)
+        self._configured = (rpm > 0, tpm > 0)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.stats = {"admitted": 0, "retries": 0, "throttled": 0, "failed": 0}
+
+    # ---------- Admission ----------
+    def _try_acquire(self, tokens: int) -> float:
+        """Admit the request and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            wait = max(
+                self.blocked_until - now,
+                self._requests.wait_for(1),
+                self._tokens.wait_for(tokens),
+                0.0 if self.in_flight < int(self.limit) else _POLL_INTERVAL,
+            )
+            if wait > 0:
+                return min(wait, 1.0)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return 0.0
+
+    def _release(self, throttled: bool, success: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self.stats["throttled"] += 1
+            elif success:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def _pause(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    # ---------- Feedback ----------
+    def observe_headers(self, headers: Any) -> None:
+        """Update limits and bucket levels from x-ratelimit-* / retry-after response headers."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket, configured, kind in (
+                (self._requests, self._configured[0], "requests"),
+                (self._tokens, self._configured[1], "tokens"),
+            ):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                try:
+                    if limit and not configured:
+                        bucket.refill(now)
+                        if bucket.capacity <= 0:
+                            bucket.level = float(limit)
+                        bucket.capacity = float(limit)
+                    if remaining is not None and bucket.capacity > 0:
+                        bucket.refill(now)
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+                if remaining == "0":
+                    reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+        retry_after = _retry_after(headers)
+        if retry_after:
+            self._pause(retry_after)
+
+    def observe_response(self, response: httpx.Response) -> None:
+        """httpx response event hook."""
+        self.observe_headers(response.headers)
+
+    async def aobserve_response(self, response: httpx.Response) -> None:
+        """httpx.AsyncClient response event hook."""
+        self.observe_headers(response.headers)
+
+    # ---------- Execution ----------
+    def _on_failure(self, error: BaseException, attempt: int, retry_on: tuple) -> Optional[float]:
+        """Return the delay before the next attempt, or None to give up."""
+        if not isinstance(error, TRANSIENT_ERRORS + retry_on) or attempt >= self.max_attempts:
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+        with self._lock:
+            self.stats["retries"] += 1
+        metrics.add_retry()
+        delay = _retry_after(getattr(getattr(error, "response", None), "headers", None))
+        if delay is None:
+            delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+        if isinstance(error, openai.RateLimitError):
+            self._pause(delay)
+        rl_logger.warning(f"LLM call failed ({type(error).__name__}), attempt {attempt}/{self.max_attempts}; retrying in {delay:.2f}s.")
+        return delay
+
+    def run(self, fn: Callable[[], T], tokens: int = 0, retry_on: tuple[type[BaseException], ...] = ()) -> T:
+        """Call `fn` once admitted, retrying transient failures. Blocks the calling thread."""
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = 0.0
+            while (wait := self._try_acquire(tokens)) > 0:
+                time.sleep(wait)
+                waited += wait
+            metrics.add_queue_wait(waited)
+            try:
+                result = fn()
+            except Exception as e:
+                self._release(isinstance(e, openai.RateLimitError), False)
+                delay = self._on_failure(e, attempt, retry_on)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._release(False, True)
+            return result
+
+    async def arun(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        retry_on: tuple[type[BaseException], ...] = (),
+    ) -> T:
+        """Async counterpart of run; waits without blocking the event loop."""
+        attempt = 0
+        while True:
+            attempt += 1
+            waited = 0.0
+            while (wait := self._try_acquire(tokens)) > 0:
+                await asyncio.sleep(wait)
+                waited += wait
+            metrics.add_queue_wait(waited)
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self._release(False, False)
+                raise
+            except Exception as e:
+                self._release(isinstance(e, openai.RateLimitError), False)
+                delay = self._on_failure(e, attempt, retry_on)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._release(False, True)
+            return result
+
+
+def estimate_tokens(messages: Sequence[Any], completion_tokens: int, model: str = "gpt-4o") -> int:
+    """Up-front token cost of a request: prompt messages plus the expected completion."""
+    per_message = 4  # role and framing tokens
+    prompt = sum(count_tokens(str(getattr(m, "content", m)), model) + per_message for m in messages)
+    return prompt + completion_tokens
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """
+    Process-wide scheduler configured from the environment:
+      OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT   quotas (default 0: learn from response headers)
+      OPENAI_MAX_CONCURRENCY              upper bound for the adaptive limit (default 16)
+      LLM_MAX_ATTEMPTS                    attempts per request including the first (default 6)
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(
+                rpm=float(os.getenv("OPENAI_RPM_LIMIT", "0")),
+                tpm=float(os.getenv("OPENAI_TPM_LIMIT", "0")),
+                max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+                max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "6")),
+            )
+        return _scheduler
@@ -1,64 +1,51 @@
+from __future__ import annotations
+
 import os
+import re
+import asyncio
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Iterator, NamedTuple, Optional
+
+from modules import metrics
+from modules.cache import cache_from_env, cache_key
+from modules.common import is_disabled
+from modules.logsetup import setup_logging
+
+# The LLM stack (langchain, openai, tiktoken) is imported when the first LLM call is
+# made, so the offline pre-redaction path stays cheap to import.
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
-from dotenv import load_dotenv
-from tenacity import retry, wait_random_exponential, stop_after_attempt, before_sleep_log
-from langchain_openai import ChatOpenAI
 
-# Attempt to import OpenAI base error (works across openai versions); fallback to Exception
-try:
-    from openai import OpenAIError as _OpenAIError
-except Exception:
-    class _OpenAIError(Exception): 
-        pass
+class _FallbackOpenAIError(Exception):
+    pass
+
+
+@lru_cache(maxsize=1)
+def _openai_error() -> type[Exception]:
+    """OpenAI base error (works across openai versions), imported on first use; fallback class otherwise."""
+    try:
+        from openai import OpenAIError
+        return OpenAIError
+    except Exception:
+        return _FallbackOpenAIError
 
 
 # Load environment variables
 dotenv_path = os.getenv("DOTENV_PATH")
 if dotenv_path:
+    from dotenv import load_dotenv
     load_dotenv(dotenv_path)
 # load_dotenv(os.getenv("DOTENV_PATH", ".env"))
 
 
-def _setup_logger() -> logging.Logger:
-    """Configure and return module logger with console and rotating file handlers."""
-    valid_levels = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-    if log_level not in valid_levels:
-        log_level = "INFO"
-    logger = logging.getLogger("redactor")
-    logger.setLevel(log_level)
-
-    if logger.hasHandlers():
-        return logger
-
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(log_level)
-    logger.addHandler(console_handler)
-
-    log_file = os.getenv("LOG_FILE", "../logs/redactor.log")
-    try:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_path, encoding="utf-8")
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(log_level)
-        logger.addHandler(file_handler)
-    except Exception as e: 
-        logger.warning(f"File logging disabled due to error: {e}")
-
-    return logger
-
-
-rdc_logger = _setup_logger()
+setup_logging()
+rdc_logger = logging.getLogger("redactor")
 
 
 def _require_env(var_name: str) -> str:
@@ -85,57 +72,575 @@ def _read_text_file(path: Path, *, encoding: str = "utf-8", max_bytes: int = 2 *
         return fh.read()
 
 
+# ---------- Offline pre-redaction ----------
+REDACTION_TOKEN = "REDACTION_TOKEN"
+
+_LLM_POLICIES = {"always", "auto", "never"}
+
+_EMAIL_RE = re.compile(r"(?<![\w.+-])[\w.+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b")
+_URL_RE = re.compile(
+    r"\b(?:https?://|www\.)[^\s<>\"')\]]+"
+    r"|\b(?:[A-Za-z0-9-]+\.)+(?:com|net|org|io|dev|me|ai|co|edu|gov|info|app)(?:\.[a-z]{2})?/[^\s<>\"')\]]*",
+    re.IGNORECASE,
+)
+_HANDLE_RE = re.compile(r"(?<![\w@.])@[A-Za-z0-9_](?:[A-Za-z0-9_.]{0,38}[A-Za-z0-9_])?\b")
+# Phone shape: optional (+)country code, optional (area code), then digit groups joined by
+# at most one space, dot or hyphen. Never starts or stops inside a longer hyphenated or
+# dotted number, so ISBNs and similar runs are not cut into phone-sized pieces.
+_PHONE_CANDIDATE_RE = re.compile(
+    r"(?<![\w+.-])"
+    r"(?:\+\d{1,3}[ .-]?|\d{1,3}[ -])?"
+    r"(?:\(\d{1,4}\)[ .-]?)?"
+    r"\d{2,5}(?:[ .-]?\d{2,5}){0,4}"
+    r"(?!\w|[.-]\d)"
+)
+_YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+_NOT_PHONE_RE = re.compile(
+    r"(?:19|20)\d{2}[.-]\d{1,2}[.-]\d{1,2}|\d{1,2}[.-]\d{1,2}[.-](?:19|20)\d{2}"  # dates
+    r"|\d{1,3}(?:\.\d{1,3}){3}"  # IPv4 addresses
+)
+_ISBN_RE = re.compile(r"97[89]\d{10}")
+
+# Signals that PII remains which the offline patterns cannot mask on their own
+_RESIDUAL_RISK_RE = re.compile(
+    r"\b(?:\d+\s+[A-Z][a-z]+\s+(?:St|Street|Rd|Road|Ave|Avenue|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Place|Pl|Way)\b"
+    r"|years?\s+old|date\s+of\s+birth|DOB|born\s+(?:on|in)|gender|marital|married|nationality|citizen(?:ship)?"
+    r"|visa|permanent\s+resident|religion|ethnicity|pronouns?|referees?|references)\b",
+    re.IGNORECASE,
+)
+_NAME_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+def _is_phone(candidate: str) -> bool:
+    groups = re.findall(r"\d+", candidate)
+    digits = "".join(groups)
+    if not 7 <= len(digits) <= 15:
+        return False
+    # Year ranges ("2019-2021", "2019 2020 2021"), dates, IP addresses and ISBN-13s are not phone numbers.
+    if all(_YEAR_RE.fullmatch(group) for group in groups) or _NOT_PHONE_RE.fullmatch(candidate):
+        return False
+    return candidate.startswith("+") or not _ISBN_RE.fullmatch(digits)
+
+
+def _redact_phones(text: str) -> tuple[str, int]:
+    parts: list[str] = []
+    kept = search = count = 0
+    while (match := _PHONE_CANDIDATE_RE.search(text, search)) is not None:
+        if _is_phone(match.group(0)):
+            parts.extend((text[kept:match.start()], REDACTION_TOKEN))
+            kept = search = match.end()
+            count += 1
+        else:
+            # A phone number may follow a rejected run ("2019-2020 0412 345 678"): retry after its first group.
+            search = match.start() + re.match(r"\D*\d+", match.group(0)).end()
+    parts.append(text[kept:])
+    return "".join(parts), count
+
+
+def pre_redact(text: str) -> tuple[str, dict[str, int]]:
+    """
+    Deterministically mask emails, URLs, phone numbers and social handles with
+    REDACTION_TOKEN. Returns the masked text and the number of hits per class.
+    """
+    counts: dict[str, int] = {}
+    # Emails go first so their domains are not picked up as URLs or handles.
+    text, counts["email"] = _EMAIL_RE.subn(REDACTION_TOKEN, text)
+    text, counts["url"] = _URL_RE.subn(REDACTION_TOKEN, text)
+    text, counts["handle"] = _HANDLE_RE.subn(REDACTION_TOKEN, text)
+    text, counts["phone"] = _redact_phones(text)
+    return text, counts
+
+
+def _mask_header(text: str, lines: int) -> tuple[str, list[str]]:
+    """redact_header, also returning the contents of the masked lines."""
+    out = text.splitlines(keepends=True)
+    masked: list[str] = []
+    for i, line in enumerate(out):
+        if len(masked) >= lines:
+            break
+        content = line.strip()
+        if not content or content == REDACTION_TOKEN:
+            continue
+        start = line.index(content)
+        out[i] = line[:start] + REDACTION_TOKEN + line[start + len(content):]
+        masked.append(content)
+    return "".join(out), masked
+
+
+def redact_header(text: str, lines: int = 1) -> str:
+    """Mask the first `lines` non-empty lines (the name header block), keeping surrounding whitespace."""
+    return _mask_header(text, lines)[0]
+
+
+def _header_words_elsewhere(header: list[str], text: str) -> list[str]:
+    """Words of the masked header lines (such as the candidate's name) still present in the rest of the text."""
+    words = {word for line in header for word in _NAME_WORD_RE.findall(line)} - {REDACTION_TOKEN}
+    return sorted(word for word in words if re.search(rf"(?<!\w){re.escape(word)}(?!\w)", text, re.IGNORECASE))
+
+
+def offline_redact(text: str) -> str:
+    """Offline-only redaction (pre-pass and header masking) for local use such as indexing; no LLM call."""
+    text, _ = pre_redact(text)
+    return redact_header(text, lines=int(os.getenv("REDACTION_HEADER_LINES", "1")))
+
+
+def _llm_policy() -> str:
+    policy = os.getenv("REDACTION_LLM_POLICY", "always").strip().lower()
+    if policy not in _LLM_POLICIES:
+        rdc_logger.warning(f"Unknown REDACTION_LLM_POLICY '{policy}', falling back to 'always'.")
+        policy = "always"
+    return policy
+
+
+def _offline_redaction(resume_text: str) -> tuple[str, bool]:
+    """
+    Apply the offline pre-pass according to REDACTION_LLM_POLICY and return
+    (text, needs_llm).
+      always - pre-pass, then always send the result to the LLM (default)
+      auto   - pre-pass and header masking; skip the LLM unless residual PII signals remain
+               or a word of the masked header (the name) appears again in the text
+      never  - pre-pass and header masking only; the LLM is never called
+    Set REDACTION_PREPASS=0 (or off) to send the raw text to the LLM under 'always'.
+    """
+    policy = _llm_policy()
+    if policy == "always" and is_disabled(os.getenv("REDACTION_PREPASS", "1")):
+        return resume_text, True
+
+    text, counts = pre_redact(resume_text)
+    rdc_logger.info(f"Offline pre-redaction masked {sum(counts.values())} span(s): {counts}")
+    if policy == "always":
+        return text, True
+
+    text, header = _mask_header(text, int(os.getenv("REDACTION_HEADER_LINES", "1")))
+    if policy == "auto" and _RESIDUAL_RISK_RE.search(text):
+        rdc_logger.info("Residual PII signals found after pre-redaction; using the LLM.")
+        return text, True
+    if policy == "auto" and _header_words_elsewhere(header, text):
+        rdc_logger.info("Header words appear outside the masked header; using the LLM.")
+        return text, True
+    rdc_logger.info(f"Skipping LLM redaction (policy={policy}).")
+    return text, False
+
+
+def _llm_settings() -> dict[str, Any]:
+    """Model settings used by load_llm; also part of the redaction cache key."""
+    return {
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o"),
+        "temperature": float(os.getenv("OPENAI_TEMPERATURE", "0")),
+        "top_p": float(os.getenv("OPENAI_TOP_P", "1")),
+    }
+
+
 def load_llm() -> ChatOpenAI:
     """Initialise and return a ChatOpenAI client configured from environment."""
+    from modules.llm import get_chat_model
+
     try:
         _require_env("OPENAI_API_KEY")
-        model_name = os.getenv("OPENAI_MODEL", "gpt-4o")
-        temperature = float(os.getenv("OPENAI_TEMPERATURE", "0"))
-        top_p = float(os.getenv("OPENAI_TOP_P", "1"))
-        llm = ChatOpenAI(model=model_name, temperature=temperature, top_p=top_p, max_retries=0)
+        llm = get_chat_model(**_llm_settings(), max_retries=0)
         return llm
     except Exception as llm_e:
         rdc_logger.critical(f"Failed to initialize LLM: {llm_e}", exc_info=True)
         raise RuntimeError(f"Failed to initialize LLM: {llm_e}") from llm_e
 
 
-@retry(
-    wait=wait_random_exponential(min=1, max=10),
-    stop=stop_after_attempt(5),
-    reraise=True,
-    before_sleep=before_sleep_log(rdc_logger, logging.WARNING),
-)
-def invoke_llm_with_retry(llm: ChatOpenAI, msg: Any) -> str:
-    """Invoke the LLM with retries and return content as string."""
-    response = llm.invoke(msg)
+class EmptyLLMResponse(RuntimeError):
+    """The model returned no usable content; worth another attempt."""
+
+
+# Expected completion size for the rate-limit token estimate: the rewrite mode echoes
+# the whole resume back, the span mode returns a short list.
+_SPANS_COMPLETION_TOKENS = 400
+
+
+def _record_usage(response: Any) -> None:
+    from modules.llm import record_usage, usage_from_message
+
+    record_usage("redaction", usage_from_message(response))
+
+
+def _content(response: Any) -> str:
+    _record_usage(response)
     content: Optional[str] = getattr(response, "content", None)
     if not isinstance(content, str) or not content.strip():
-        raise RuntimeError("LLM returned empty response.")
+        raise EmptyLLMResponse("LLM returned empty response.")
     return content
 
 
-def redaction_run(resume_path: str) -> str:
-    """Run redaction for the given resume file path and return redacted content."""
-    from modules.prompts import redaction_prompt
+def _rewrite_tokens(msg: Any) -> int:
+    from modules.ratelimit import estimate_tokens
+
+    return estimate_tokens(msg, completion_tokens=estimate_tokens(msg[-1:], 0), model=_llm_settings()["model"])
+
+
+def _spans(output: dict) -> list[Any]:
+    _record_usage(output["raw"])
+    if output["parsing_error"] is not None:
+        raise output["parsing_error"]
+    return output["parsed"].spans
+
+
+def invoke_llm_with_retry(llm: ChatOpenAI, msg: Any) -> str:
+    """Invoke the LLM through the shared rate-limit scheduler and return content as string."""
+    from modules.ratelimit import get_scheduler
+
+    return get_scheduler().run(lambda: _content(llm.invoke(msg)), tokens=_rewrite_tokens(msg), retry_on=(EmptyLLMResponse,))
+
+
+async def ainvoke_llm_with_retry(llm: ChatOpenAI, msg: Any) -> str:
+    """Async counterpart of invoke_llm_with_retry using the model's ainvoke path."""
+    from modules.ratelimit import get_scheduler
+
+    async def _call() -> str:
+        return _content(await llm.ainvoke(msg))
+
+    return await get_scheduler().arun(_call, tokens=_rewrite_tokens(msg), retry_on=(EmptyLLMResponse,))
+
 
-    prompt = redaction_prompt()
-    llm = load_llm()
+def invoke_spans_with_retry(llm: ChatOpenAI, msg: Any) -> list[Any]:
+    """Invoke the LLM for structured PII spans through the shared rate-limit scheduler."""
+    from modules.prompts import RedactionSpans
+    from modules.ratelimit import estimate_tokens, get_scheduler
 
+    model = llm.with_structured_output(RedactionSpans, include_raw=True)
+    tokens = estimate_tokens(msg, _SPANS_COMPLETION_TOKENS, _llm_settings()["model"])
+    return get_scheduler().run(lambda: _spans(model.invoke(msg)), tokens=tokens)
+
+
+async def ainvoke_spans_with_retry(llm: ChatOpenAI, msg: Any) -> list[Any]:
+    """Async counterpart of invoke_spans_with_retry."""
+    from modules.prompts import RedactionSpans
+    from modules.ratelimit import estimate_tokens, get_scheduler
+
+    model = llm.with_structured_output(RedactionSpans, include_raw=True)
+    tokens = estimate_tokens(msg, _SPANS_COMPLETION_TOKENS, _llm_settings()["model"])
+
+    async def _call() -> list[Any]:
+        return _spans(await model.ainvoke(msg))
+
+    return await get_scheduler().arun(_call, tokens=tokens)
+
+
+# ---------- Span-based redaction ----------
+def _redaction_mode() -> str:
+    mode = os.getenv("REDACTION_MODE", "rewrite").strip().lower()
+    if mode not in {"rewrite", "spans"}:
+        rdc_logger.warning(f"Unknown REDACTION_MODE '{mode}', falling back to 'rewrite'.")
+        mode = "rewrite"
+    return mode
+
+
+def _find_all(text: str, needle: str) -> list[int]:
+    """
+    Start offsets of the complete occurrences of `needle`: matches inside a longer
+    word are skipped, so a span "John" leaves "Johnny" alone and "Mark" leaves
+    "Marketing" alone. Occurrence numbers count these complete matches only.
+    """
+    pattern = re.compile(rf"(?<!\w){re.escape(needle)}(?!\w)")
+    return [match.start() for match in pattern.finditer(text)]
+
+
+def apply_redaction_spans(text: str, spans: list[Any]) -> str:
+    """
+    Replace the given PII spans in `text` with REDACTION_TOKEN. Each span carries
+    `text` and `occurrence` (1-based; 0 means every occurrence). Everything outside
+    the spans is copied through unchanged, so whitespace is preserved exactly.
+    """
+    return _apply_intervals(text, _span_intervals(text, spans))
+
+
+def _span_intervals(text: str, spans: list[Any]) -> list[tuple[int, int]]:
+    """(start, end) character ranges of the reported spans in `text`; unmatched spans are ignored."""
+    intervals: list[tuple[int, int]] = []
+    for span in spans:
+        needle = span.text
+        if not needle.strip() or needle == REDACTION_TOKEN:
+            continue
+        positions = _find_all(text, needle)
+        if not positions:
+            rdc_logger.debug(f"Reported {span.category} span not found in input; ignored.")
+            continue
+        if span.occurrence:
+            if span.occurrence > len(positions):
+                rdc_logger.debug(f"Reported {span.category} span occurrence out of range; redacting all.")
+            else:
+                positions = [positions[span.occurrence - 1]]
+        intervals.extend((pos, pos + len(needle)) for pos in positions)
+    return intervals
+
+
+def _apply_intervals(text: str, intervals: list[tuple[int, int]]) -> str:
+    pieces: list[str] = []
+    cursor = 0
+    for start, end in sorted(intervals):
+        if end <= cursor:
+            continue
+        if start < cursor:
+            # Overlaps the previous span: extend it instead of emitting a second token.
+            cursor = end
+            continue
+        pieces.append(text[cursor:start])
+        pieces.append(REDACTION_TOKEN)
+        cursor = end
+    pieces.append(text[cursor:])
+    return "".join(pieces)
+
+
+# ---------- Chunked redaction ----------
+# Upper bound on threads redacting the chunks of one resume in the sync path; the
+# rate-limit scheduler still decides how many calls are actually in flight.
+_CHUNK_WORKERS = 16
+
+
+def _chunk_settings() -> tuple[int, int]:
+    """
+    Chunked redaction settings:
+      REDACTION_CHUNK_TOKENS    resumes longer than this many tokens are redacted in chunks of
+                                about this size, concurrently (default 3000; 0 disables)
+      REDACTION_CHUNK_OVERLAP   tokens of neighbouring text sent with each chunk (default 100)
+    """
+    return int(os.getenv("REDACTION_CHUNK_TOKENS", "3000")), int(os.getenv("REDACTION_CHUNK_OVERLAP", "100"))
+
+
+def _max_input_bytes() -> int:
+    """REDACTION_MAX_BYTES; defaults to 16 MB with chunked redaction on, else 2 MB."""
+    default_mb = 16 if _chunk_settings()[0] > 0 else 2
+    return int(os.getenv("REDACTION_MAX_BYTES", str(default_mb * 1024 * 1024)))
+
+
+def _chunk_windows(text: str) -> Optional[list[tuple[int, int]]]:
+    """
+    Split text that exceeds REDACTION_CHUNK_TOKENS on section and paragraph boundaries
+    and return each chunk's context window (the chunk plus the overlap on both sides).
+    None when chunking is off or the text fits in one call.
+    """
+    from modules.chunking import context_windows, split_chunks
+    from modules.packing import count_tokens
+
+    chunk_tokens, overlap_tokens = _chunk_settings()
+    if chunk_tokens <= 0:
+        return None
+    model = _llm_settings()["model"]
+    total = count_tokens(text, model)
+    if total <= chunk_tokens:
+        return None
+    bounds = split_chunks(text, chunk_tokens, lambda piece: count_tokens(piece, model))
+    if len(bounds) < 2:
+        return None
+    return context_windows(text, bounds, overlap_tokens * len(text) // max(1, total))
+
+
+def _merge_chunk_spans(text: str, windows: list[tuple[int, int]], results: list[list[Any]]) -> str:
+    """
+    Apply every window's spans at their positions in the full text, so PII that straddles
+    a chunk boundary is redacted whole and everything else is copied through byte for
+    byte. Spans reported for every occurrence apply to the whole text, as in one call.
+    """
+    intervals: list[tuple[int, int]] = []
+    everywhere: set[str] = set()
+    for (start, end), spans in zip(windows, results):
+        intervals.extend((start + a, start + b) for a, b in _span_intervals(text[start:end], spans))
+        everywhere.update(
+            span.text for span in spans
+            if span.occurrence == 0 and span.text.strip() and span.text != REDACTION_TOKEN
+        )
+    for needle in everywhere:
+        intervals.extend((pos, pos + len(needle)) for pos in _find_all(text, needle))
+    return _apply_intervals(text, intervals)
+
+
+def _chunk_messages(text: str, windows: list[tuple[int, int]]) -> list[Any]:
+    from modules.prompts import redaction_spans_prompt
+
+    prompt = redaction_spans_prompt()
+    return [prompt.format_messages(input=text[start:end]) for start, end in windows]
+
+
+def redact_chunked(llm: ChatOpenAI, text: str, windows: list[tuple[int, int]]) -> str:
+    """Redact each window with the span prompt on a thread pool and stitch the result."""
+    messages = _chunk_messages(text, windows)
+    with ThreadPoolExecutor(max_workers=min(len(messages), _CHUNK_WORKERS)) as pool:
+        # Each call runs in a copy of this context so its usage lands on the redaction span.
+        futures = [pool.submit(contextvars.copy_context().run, invoke_spans_with_retry, llm, msg) for msg in messages]
+        results = [future.result() for future in futures]
+    return _merge_chunk_spans(text, windows, results)
+
+
+async def aredact_chunked(llm: ChatOpenAI, text: str, windows: list[tuple[int, int]]) -> str:
+    """Async counterpart of redact_chunked; the windows are redacted concurrently."""
+    messages = _chunk_messages(text, windows)
+    results = await asyncio.gather(*(ainvoke_spans_with_retry(llm, msg) for msg in messages))
+    return _merge_chunk_spans(text, windows, list(results))
+
+
+def _redaction_cache_key(msg: Any, variant: str = "") -> str:
+    """Hash of everything the redaction output depends on: prompt, resume text, model settings and chunking."""
+    rendered = "\n".join(f"{m.type}:{m.content}" for m in msg)
+    settings = ",".join(f"{k}={v}" for k, v in sorted(_llm_settings().items()))
+    if variant:
+        return cache_key("redaction", rendered, settings, variant)
+    return cache_key("redaction", rendered, settings)
+
+
+def _cached_redaction(msg: Any, variant: str = "") -> tuple[Optional[str], Optional[str]]:
+    """Look up a redaction; returns (cached_text, key), key being None when caching is disabled."""
+    cache = cache_from_env("redaction", ".cache/redaction.sqlite")
+    if cache is None:
+        return None, None
+    key = _redaction_cache_key(msg, variant)
     try:
-        path_obj = Path(resume_path).expanduser().resolve()
-        resume_text = _read_text_file(path_obj)
-        rdc_logger.info("Successfully accessed the resume file")
-
-        msg = prompt.format_messages(input=resume_text)
-        llm_response = invoke_llm_with_retry(llm=llm, msg=msg)
-        rdc_logger.info("Redaction completed successfully.")
-        return llm_response
-    except _OpenAIError as openai_error:
-        rdc_logger.error(f"OpenAI error: {openai_error}", exc_info=True)
-        raise
-    except (FileNotFoundError, ValueError) as io_err:
-        rdc_logger.error(f"Input error: {io_err}")
-        raise
+        cached = cache.get(key)
     except Exception as e:
-        rdc_logger.exception(f"Unexpected error during redaction: {e}")
-        raise
+        rdc_logger.warning(f"Redaction cache lookup failed: {e}")
+        return None, key
+    metrics.set_cache_hit(cached is not None)
+    if cached is not None:
+        rdc_logger.info(f"Redaction cache hit ({cache.stats()}).")
+    return cached, key
+
+
+def _store_redaction(key: Optional[str], redacted: str) -> None:
+    cache = cache_from_env("redaction", ".cache/redaction.sqlite")
+    if cache is None or key is None:
+        return
+    try:
+        cache.put(key, redacted)
+    except Exception as e:
+        rdc_logger.warning(f"Redaction cache write failed: {e}")
+
+
+def _read_resume(resume_path: str | Path) -> str:
+    """Resume text; PDF and DOCX files are extracted in memory by modules.ingest."""
+    from modules.ingest import DOCUMENT_EXTENSIONS, read_document
+
+    path_obj = Path(resume_path).expanduser().resolve()
+    with metrics.span("resume_read"):
+        if path_obj.suffix.lower() in DOCUMENT_EXTENSIONS:
+            resume_text = read_document(path_obj, max_bytes=_max_input_bytes())
+        else:
+            resume_text = _read_text_file(path_obj, max_bytes=_max_input_bytes())
+    rdc_logger.info("Successfully accessed the resume file")
+    return resume_text
+
+
+async def _aread_resume(resume_path: str | Path) -> str:
+    """Async counterpart of _read_resume; document extraction does not block the event loop."""
+    from modules.ingest import DOCUMENT_EXTENSIONS, aread_document
+
+    path_obj = Path(resume_path).expanduser().resolve()
+    if path_obj.suffix.lower() not in DOCUMENT_EXTENSIONS:
+        return _read_resume(path_obj)
+    with metrics.span("resume_read", extracted=True):
+        resume_text = await aread_document(path_obj, max_bytes=_max_input_bytes())
+    rdc_logger.info("Successfully accessed the resume file")
+    return resume_text
+
+
+class _RedactionPlan(NamedTuple):
+    """What is left to do for one resume after the offline pass and the cache lookup."""
+    text: str
+    result: Optional[str]  # set when no LLM call is needed (skipped or cached)
+    mode: str
+    windows: list
+    msg: list
+    key: Optional[str]
+
+
+@contextmanager
+def _redaction_span() -> Iterator[metrics.Span]:
+    """The "redaction" span; errors are logged by kind and re-raised."""
+    with metrics.span("redaction") as redaction_span:
+        try:
+            yield redaction_span
+        except _openai_error() as openai_error:
+            rdc_logger.error(f"OpenAI error: {openai_error}", exc_info=True)
+            raise
+        except ValueError as input_err:
+            rdc_logger.error(f"Input error: {input_err}")
+            raise
+        except Exception as e:
+            rdc_logger.exception(f"Unexpected error during redaction: {e}")
+            raise
+
+
+def _plan_redaction(resume_text: str, redaction_span: metrics.Span) -> _RedactionPlan:
+    """Offline pass, then (when the LLM is needed) mode and chunk window selection and the cache lookup."""
+    from modules.prompts import redaction_prompt, redaction_spans_prompt
+
+    resume_text, needs_llm = _offline_redaction(resume_text)
+    redaction_span.attributes["llm"] = needs_llm
+    if not needs_llm:
+        return _RedactionPlan(resume_text, resume_text, "", [], [], None)
+
+    mode = _redaction_mode()
+    windows = _chunk_windows(resume_text)
+    variant = ""
+    if windows:
+        # Chunks are always redacted by span so the stitched text stays byte-exact.
+        mode, variant = "chunked", "chunked:{}:{}".format(*_chunk_settings())
+        redaction_span.attributes["chunks"] = len(windows)
+    redaction_span.attributes["mode"] = mode
+    prompt = redaction_prompt() if mode == "rewrite" else redaction_spans_prompt()
+    msg = prompt.format_messages(input=resume_text)
+    cached, key = _cached_redaction(msg, variant)
+    return _RedactionPlan(resume_text, cached, mode, windows, msg, key)
+
+
+def _finish_redaction(plan: _RedactionPlan, llm_response: str) -> str:
+    rdc_logger.info("Redaction completed successfully.")
+    _store_redaction(plan.key, llm_response)
+    return llm_response
+
+
+def redact_text(resume_text: str) -> str:
+    """Redact resume text already in memory and return the redacted content."""
+    with _redaction_span() as redaction_span:
+        plan = _plan_redaction(resume_text, redaction_span)
+        if plan.result is not None:
+            return plan.result
+        llm = load_llm()
+        if plan.windows:
+            llm_response = redact_chunked(llm, plan.text, plan.windows)
+        elif plan.mode == "spans":
+            llm_response = apply_redaction_spans(plan.text, invoke_spans_with_retry(llm=llm, msg=plan.msg))
+        else:
+            llm_response = invoke_llm_with_retry(llm=llm, msg=plan.msg)
+        return _finish_redaction(plan, llm_response)
+
+
+async def aredact_text(resume_text: str) -> str:
+    """Async counterpart of redact_text using the model's ainvoke path."""
+    with _redaction_span() as redaction_span:
+        plan = _plan_redaction(resume_text, redaction_span)
+        if plan.result is not None:
+            return plan.result
+        llm = load_llm()
+        if plan.windows:
+            llm_response = await aredact_chunked(llm, plan.text, plan.windows)
+        elif plan.mode == "spans":
+            llm_response = apply_redaction_spans(plan.text, await ainvoke_spans_with_retry(llm=llm, msg=plan.msg))
+        else:
+            llm_response = await ainvoke_llm_with_retry(llm=llm, msg=plan.msg)
+        return _finish_redaction(plan, llm_response)
+
+
+def redaction_run(resume_path: str | Path) -> str:
+    """Run redaction for the given resume file path and return redacted content."""
+    with metrics.request("redaction_run"):
+        try:
+            resume_text = _read_resume(resume_path)
+        except (FileNotFoundError, ValueError) as io_err:
+            rdc_logger.error(f"Input error: {io_err}")
+            raise
+        return redact_text(resume_text)
+
+
+async def aredaction_run(resume_path: str | Path) -> str:
+    """Async redaction for batch use; same contract as redaction_run."""
+    with metrics.request("redaction_run"):
+        try:
+            resume_text = await _aread_resume(resume_path)
+        except (FileNotFoundError, ValueError) as io_err:
+            rdc_logger.error(f"Input error: {io_err}")
+            raise
+        return await aredact_text(resume_text)
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from modules.common import ThreadConnections, is_disabled
+
+results_logger = logging.getLogger("resume_assesor.results")
+
+# Statuses worth keeping: errors are not stored, so a later run retries the pair.
+_STORED_STATUSES = {"ok", "screened_out"}
+
+
+def file_id(path: str | Path) -> str:
+    """Content ID of a resume or job description file (first 16 hex digits of its SHA-256)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class ResultsStore:
+    """
+    Batch results persisted in SQLite (WAL mode), one row per (job description,
+    candidate) pair keyed by the files' content IDs, so renamed or copied files keep
+    their results and edited ones are evaluated afresh. Every pair is committed as it
+    finishes; an interrupted run loses at most the pairs still in flight. Rows are
+    indexed by JD and overall match score for ranked queries, and by candidate.
+    Each thread gets its own connection; SQLite's locking makes the store safe to
+    share between processes on one host.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._connections = ThreadConnections(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " jd_id TEXT NOT NULL,"
+                " candidate_id TEXT NOT NULL,"
+                " position TEXT NOT NULL,"
+                " resume TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " overall_match_score REAL,"
+                " record TEXT NOT NULL,"
+                " completed REAL NOT NULL,"
+                " PRIMARY KEY (jd_id, candidate_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_jd_score ON results (jd_id, overall_match_score DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_candidate ON results (candidate_id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def put(self, jd_id: str, candidate_id: str, record: dict) -> None:
+        """
+        Commit one batch output record. Error records are skipped, and a
+        "screened_out" record never replaces a finished evaluation of the same pair.
+        """
+        status = record.get("status")
+        if status not in _STORED_STATUSES:
+            return
+        score = None
+        if status == "ok":
+            score = record["result"]["evaluation"]["overall_match_score"]
+        self._connect().execute(
+            "INSERT INTO results (jd_id, candidate_id, position, resume, status, overall_match_score, record, completed)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (jd_id, candidate_id) DO UPDATE SET"
+            " position = excluded.position, resume = excluded.resume, status = excluded.status,"
+            " overall_match_score = excluded.overall_match_score, record = excluded.record, completed = excluded.completed"
+            " WHERE results.status != 'ok' OR excluded.status = 'ok'",
+            (
+                jd_id, candidate_id, record.get("position", ""), record.get("resume", ""), status, score,
+                json.dumps(record, ensure_ascii=False), time.time(),
+            ),
+        )
+
+    def completed(self, jd_id: str) -> set[str]:
+        """Candidate IDs with a finished evaluation for the job description."""
+        rows = self._connect().execute("SELECT candidate_id FROM results WHERE jd_id = ? AND status = 'ok'", (jd_id,))
+        return {candidate_id for (candidate_id,) in rows}
+
+    def top(self, jd_id: str, n: int) -> list[dict]:
+        """The `n` best evaluated records for the job description, highest overall match score first."""
+        rows = self._connect().execute(
+            "SELECT candidate_id, record FROM results"
+            " WHERE jd_id = ? AND overall_match_score IS NOT NULL"
+            " ORDER BY overall_match_score DESC LIMIT ?",
+            (jd_id, n),
+        )
+        return [{"candidate_id": candidate_id, **json.loads(record)} for candidate_id, record in rows]
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def store_from_env(path: Optional[str] = None, default_path: str = "results.sqlite") -> Optional[ResultsStore]:
+    """
+    The results store at `path`, or RESULTS_DB (default results.sqlite) when no path
+    is given; None when it is set to 0 (disabled).
+    """
+    if path is None:
+        path = os.getenv("RESULTS_DB", default_path)
+    path = path.strip()
+    if is_disabled(path):
+        return None
+    return ResultsStore(path)
@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+
+from modules.prompts import CATEGORY_WEIGHTS, FIT_THRESHOLDS, EvaluationOutput
+
+CATEGORY_NAMES: tuple[str, ...] = tuple(CATEGORY_WEIGHTS)
+WEAK_FIT = "Weak Fit"
+
+
+def _categories_of(result: EvaluationOutput | Mapping[str, Any]) -> Mapping[str, Any]:
+    if isinstance(result, EvaluationOutput):
+        return result.evaluation.categories.model_dump()
+    evaluation = result.get("evaluation", result)
+    return evaluation["categories"]
+
+
+def score_matrix(results: Sequence[EvaluationOutput | Mapping[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stack category scores and confidences into two (n_results, n_categories) arrays,
+    columns in CATEGORY_NAMES order. Accepts EvaluationOutput objects or their dumps.
+    """
+    scores = np.empty((len(results), len(CATEGORY_NAMES)), dtype=np.float64)
+    confidences = np.empty_like(scores)
+    for i, result in enumerate(results):
+        categories = _categories_of(result)
+        for j, name in enumerate(CATEGORY_NAMES):
+            scores[i, j] = categories[name]["score"]
+            confidences[i, j] = categories[name]["confidence"]
+    return scores, confidences
+
+
+def _weight_vector(weights: Optional[Mapping[str, float]]) -> np.ndarray:
+    weights = {**CATEGORY_WEIGHTS, **(weights or {})}
+    unknown = set(weights) - set(CATEGORY_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown categories in weights: {sorted(unknown)}")
+    vector = np.array([weights[name] for name in CATEGORY_NAMES], dtype=np.float64)
+    if (vector < 0).any() or vector.sum() <= 0:
+        raise ValueError("Weights must be non-negative and not all zero.")
+    return vector
+
+
+def _weighted_mean(values: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """
+    Row-wise weighted mean rounded to 2 decimal points with the float operations of
+    compute_rollups (products summed in category order, divided by the weight total,
+    Python's round), so results agree to the last digit. np.round rounds ties of the
+    binary value differently.
+    """
+    weighted = np.zeros(len(values))
+    for j, weight in enumerate(vector):
+        weighted = weighted + weight * values[:, j]
+    means = weighted / sum(vector.tolist())
+    return np.array([round(mean, 2) for mean in means.tolist()], dtype=np.float64)
+
+
+def rescore(
+    scores: np.ndarray,
+    confidences: np.ndarray,
+    weights: Optional[Mapping[str, float]] = None,
+    thresholds: Optional[Mapping[str, float]] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Recompute the rollups for every row at once. `weights` overrides CATEGORY_WEIGHTS
+    per category (relative values; they are normalised) and `thresholds` overrides
+    FIT_THRESHOLDS. Returns overall_match_score, cumulative_confidence and
+    fit_classification arrays, matching compute_rollups for the same settings.
+    """
+    vector = _weight_vector(weights)
+    overall = _weighted_mean(scores, vector)
+    confidence = _weighted_mean(confidences, vector)
+
+    fit = np.full(overall.shape, WEAK_FIT, dtype=object)
+    # Highest floor wins, so assign from the lowest floor upwards.
+    for label, floor in sorted({**FIT_THRESHOLDS, **(thresholds or {})}.items(), key=lambda item: item[1]):
+        fit[overall >= floor] = label
+    return {
+        "overall_match_score": overall,
+        "cumulative_confidence": confidence,
+        "fit_classification": fit,
+    }
+
+
+def rank(
+    scores: np.ndarray,
+    confidences: np.ndarray,
+    weights: Optional[Mapping[str, float]] = None,
+    thresholds: Optional[Mapping[str, float]] = None,
+    top: Optional[int] = None,
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Order rows by re-scored overall_match_score (ties broken by confidence), best
+    first. Returns the row indices (at most `top`) and the full rescore() arrays.
+    """
+    rollups = rescore(scores, confidences, weights, thresholds)
+    order = np.lexsort((-rollups["cumulative_confidence"], -rollups["overall_match_score"]))
+    if top is not None:
+        order = order[:top]
+    return order, rollups
+
+
+def load_batch_results(path: str | Path) -> tuple[list[dict], np.ndarray, np.ndarray]:
+    """
+    Read successful records from a batch-mode JSONL file and return them with their
+    score and confidence matrices, ready for rescore() or rank().
+    """
+    records: list[dict] = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("status") == "ok":
+                records.append(record)
+    scores, confidences = score_matrix([record["result"] for record in records])
+    return records, scores, confidences
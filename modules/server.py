@@ -0,0 +1,252 @@
+import json
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from modules import metrics
+
+srv_logger = logging.getLogger("resume_assesor.server")
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class BadRequest(ValueError):
+    """Raised while reading a request that cannot be served."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class _Job:
+    payload: dict
+    deadline: float
+    future: asyncio.Future = field(repr=False)
+
+
+class EvaluationServer:
+    """
+    Minimal HTTP/1.1 JSON server on asyncio streams (no extra dependencies).
+
+    POST /evaluate   body is a JSON object passed to `handler`; its result is returned as JSON
+    GET  /health     liveness plus queue depth
+    GET  /metrics    stage latency, token, retry and cache metrics in Prometheus text format
+
+    Jobs go through a bounded queue drained by `workers` tasks. When the queue is full
+    the request is rejected with 429 instead of piling up; each job must finish within
+    `timeout` seconds of arrival, queueing included, or it is answered with 504.
+    A handler raising BadRequest is answered with its status (400 by default); any
+    other exception, including a ValueError from deep inside the evaluation, is a
+    500. Connections are kept alive.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        queue_size: int = 100,
+        workers: int = 4,
+        timeout: float = 120.0,
+        max_body: int = 2 * 1024 * 1024,
+    ) -> None:
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_body = max_body
+        self.queue: asyncio.Queue[_Job] = asyncio.Queue(maxsize=max(1, queue_size))
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._started = time.monotonic()
+
+    # ---------- Lifecycle ----------
+    async def start(self) -> None:
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        srv_logger.info(
+            f"Listening on http://{self.host}:{self.port} "
+            f"(workers={self.workers}, queue={self.queue.maxsize}, timeout={self.timeout}s)."
+        )
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    # ---------- Work queue ----------
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                remaining = job.deadline - time.monotonic()
+                if job.future.done():
+                    continue
+                if remaining <= 0:
+                    job.future.set_exception(asyncio.TimeoutError())
+                    continue
+                try:
+                    result = await asyncio.wait_for(self.handler(job.payload), remaining)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                self.queue.task_done()
+
+    async def _submit(self, payload: dict) -> tuple[int, Any, dict[str, str]]:
+        job = _Job(payload, time.monotonic() + self.timeout, asyncio.get_running_loop().create_future())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            srv_logger.warning("Work queue full; rejecting request with 429.")
+            return 429, {"error": "Server busy, retry later."}, {"Retry-After": "1"}
+        try:
+            # Small grace so the worker's own deadline is what normally fires.
+            result = await asyncio.wait_for(asyncio.shield(job.future), self.timeout + 1)
+        except asyncio.TimeoutError:
+            job.future.cancel()
+            return 504, {"error": f"Evaluation did not finish within {self.timeout}s."}, {}
+        except BadRequest as e:
+            return e.status, {"error": str(e)}, {}
+        except Exception as e:
+            srv_logger.error(f"Evaluation failed: {e}", exc_info=True)
+            return 500, {"error": "Evaluation failed."}, {}
+        return 200, result, {}
+
+    # ---------- HTTP ----------
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[tuple[str, str, dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest("Malformed request line.")
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise BadRequest("Invalid Content-Length.")
+        if length > self.max_body:
+            raise BadRequest(f"Body exceeds {self.max_body} bytes.", status=413)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, Any, dict[str, str]]:
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET."}, {"Allow": "GET"}
+            return 200, {
+                "status": "ok",
+                "uptime_s": round(time.monotonic() - self._started, 1),
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "workers": self.workers,
+            }, {}
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Use GET."}, {"Allow": "GET"}
+            return 200, metrics.render_prometheus(), {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        if path == "/evaluate":
+            if method != "POST":
+                return 405, {"error": "Use POST."}, {"Allow": "POST"}
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                return 400, {"error": "Body must be valid JSON."}, {}
+            if not isinstance(payload, dict):
+                return 400, {"error": "Body must be a JSON object."}, {}
+            return await self._submit(payload)
+        return 404, {"error": f"No route for {path}."}, {}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, payload, extra = await self._route(method, path, body)
+                except BadRequest as e:
+                    status, payload, extra, keep_alive = e.status, {"error": str(e)}, {}, False
+                except asyncio.IncompleteReadError:
+                    break
+                await self._write_response(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Any,
+        extra_headers: dict[str, str],
+        keep_alive: bool,
+    ) -> None:
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **extra_headers,
+        }
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+wq_logger = logging.getLogger("resume_assesor.workqueue")
+
+_ITEM_RE = re.compile(r"^(\d{8})-([0-9a-f]{16})$")
+
+
+class WorkItem(NamedTuple):
+    name: str
+    resume: str
+    position: str
+
+
+def _item_name(name: str) -> Optional[re.Match]:
+    return _ITEM_RE.match(name)
+
+
+class WorkQueue:
+    """
+    Work queue of (resume, position) pairs kept as files in a directory, which may
+    sit on storage shared by several hosts. Every state change is an atomic rename,
+    so no lock server is needed:
+
+        pending/<item>.json           waiting to be claimed
+        leased/<item>@<worker>.json   claimed; the file's timestamp is the last heartbeat
+        done/<item>.json              the finished output record
+        sealed                        present once everything has been enqueued
+        merged                        items whose records a coordinator has written out
+
+    A lease whose heartbeat is older than `lease` seconds belongs to a dead or stuck
+    worker and is moved back to pending/ by whichever process reaps first. A result
+    written after its lease was reaped is still kept; the pair is simply not evaluated
+    again. Hosts sharing a queue need synchronised clocks.
+    """
+
+    def __init__(self, root: str | Path, lease: float = 60.0) -> None:
+        self.root = Path(root)
+        self.lease = lease
+        self.pending = self.root / "pending"
+        self.leased = self.root / "leased"
+        self.done = self.root / "done"
+        for directory in (self.pending, self.leased, self.done):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._backlog: list[str] = []
+
+    @staticmethod
+    def _names(directory: Path) -> list[str]:
+        names = []
+        for entry in os.scandir(directory):
+            name = entry.name.split("@", 1)[0].removesuffix(".json")
+            if _item_name(name):
+                names.append(name)
+        return names
+
+    # ---------- Coordinator ----------
+    def enqueue(self, pairs: Iterable[tuple[str, str]]) -> int:
+        """
+        Add (resume, position) pairs, as absolute paths, in order. Pairs already
+        pending, leased or done are skipped, so re-running a coordinator on the same
+        queue only adds what is missing. Returns the number of new items.
+        """
+        existing = self._names(self.pending) + self._names(self.leased) + self._names(self.done)
+        known = {_item_name(name).group(2) for name in existing}
+        sequence = max((int(_item_name(name).group(1)) for name in existing), default=0)
+        added = 0
+        for resume, position in pairs:
+            item_id = hashlib.sha256(f"{resume}\0{position}".encode("utf-8")).hexdigest()[:16]
+            if item_id in known:
+                continue
+            known.add(item_id)
+            sequence += 1
+            name = f"{sequence:08d}-{item_id}"
+            self._write(self.pending / f"{name}.json", {"resume": resume, "position": position})
+            added += 1
+        return added
+
+    def retry_failed(self) -> int:
+        """
+        Move finished items whose record is not "ok" back to pending/ (and off the
+        merged list), so a re-run coordinator evaluates them again. Returns how many.
+        """
+        failed = []
+        for name in self._names(self.done):
+            try:
+                record = json.loads((self.done / f"{name}.json").read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if record.get("status") != "ok":
+                failed.append(name)
+        if not failed:
+            return 0
+        # Off the merged list first: the retried item's new record must be merged again.
+        merged = self.merged() - set(failed)
+        tmp = self.root / f".merged.{os.getpid()}.tmp"
+        tmp.write_text("".join(f"{name}\n" for name in sorted(merged)), encoding="utf-8")
+        os.replace(tmp, self.root / "merged")
+        for name in failed:
+            # The record keeps the item's resume and position, so it is a valid pending item.
+            try:
+                os.rename(self.done / f"{name}.json", self.pending / f"{name}.json")
+            except FileNotFoundError:
+                continue
+        return len(failed)
+
+    def seal(self) -> None:
+        """Mark the queue complete: workers exit once it is drained."""
+        (self.root / "sealed").touch()
+
+    @property
+    def sealed(self) -> bool:
+        return (self.root / "sealed").exists()
+
+    def counts(self) -> dict[str, int]:
+        return {state: len(self._names(getattr(self, state))) for state in ("pending", "leased", "done")}
+
+    def finished(self) -> bool:
+        """Sealed, with nothing left pending or leased."""
+        return self.sealed and not self._names(self.pending) and not self._names(self.leased)
+
+    def results(self, seen: set[str]) -> Iterator[tuple[str, dict]]:
+        """(item, record) for finished items not in `seen` (which is updated), in enqueue order."""
+        for name in sorted(set(self._names(self.done)) - seen):
+            try:
+                record = json.loads((self.done / f"{name}.json").read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                wq_logger.warning(f"Skipping unreadable result {name}: {e}")
+                continue
+            seen.add(name)
+            yield name, record
+
+    def merged(self) -> set[str]:
+        """Items recorded with mark_merged, by this or an earlier coordinator."""
+        try:
+            return set((self.root / "merged").read_text(encoding="utf-8").split())
+        except FileNotFoundError:
+            return set()
+
+    def mark_merged(self, name: str) -> None:
+        """Record that the item's result has been written out, so a re-run does not emit it again."""
+        with open(self.root / "merged", "a", encoding="utf-8") as f:
+            f.write(f"{name}\n")
+
+    # ---------- Workers ----------
+    def claim(self, worker: str) -> Optional[WorkItem]:
+        """Lease the next pending item for `worker`, or None when nothing is pending."""
+        while True:
+            with self._lock:
+                if not self._backlog:
+                    # Each worker walks the listing from a random point, so workers rarely race for the same file.
+                    names = sorted(self._names(self.pending))
+                    if not names:
+                        return None
+                    start = random.randrange(len(names))
+                    self._backlog = list(reversed(names[start:] + names[:start]))
+                name = self._backlog.pop()
+            lease_file = self.leased / f"{name}@{worker}.json"
+            try:
+                os.rename(self.pending / f"{name}.json", lease_file)
+            except FileNotFoundError:
+                continue
+            # The rename kept the enqueue time; the lease starts now.
+            os.utime(lease_file)
+            if (self.done / f"{name}.json").exists():
+                # Finished by a worker whose lease had been reaped.
+                lease_file.unlink(missing_ok=True)
+                continue
+            try:
+                item = json.loads(lease_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                wq_logger.error(f"Dropping malformed work item {name}: {e}")
+                lease_file.unlink(missing_ok=True)
+                continue
+            return WorkItem(name, item["resume"], item["position"])
+
+    def heartbeat(self, worker: str, names: Iterable[str]) -> set[str]:
+        """Renew the leases of `worker` on `names`; returns the ones that were lost to reaping."""
+        lost = set()
+        for name in names:
+            try:
+                os.utime(self.leased / f"{name}@{worker}.json")
+            except FileNotFoundError:
+                lost.add(name)
+        return lost
+
+    def complete(self, item: WorkItem, worker: str, record: dict) -> None:
+        """Store the item's output record and release its lease."""
+        self._write(self.done / f"{item.name}.json", record)
+        (self.leased / f"{item.name}@{worker}.json").unlink(missing_ok=True)
+
+    def reap(self) -> int:
+        """Move leases without a heartbeat for `lease` seconds back to pending; returns how many."""
+        now = time.time()
+        reaped = 0
+        for entry in os.scandir(self.leased):
+            name = entry.name.split("@", 1)[0]
+            if not _item_name(name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            # ctime too: a rename updates it even where mtime is preserved.
+            if now - max(stat.st_mtime, stat.st_ctime) <= self.lease:
+                continue
+            try:
+                if (self.done / f"{name}.json").exists():
+                    os.unlink(entry.path)
+                else:
+                    os.rename(entry.path, self.pending / f"{name}.json")
+                    reaped += 1
+                    wq_logger.warning(f"Lease expired on {name} ({entry.name.split('@', 1)[1].removesuffix('.json')}); re-queued.")
+            except FileNotFoundError:
+                continue
+        return reaped
+
+    @staticmethod
+    def _write(path: Path, payload: dict) -> None:
+        """Write JSON so readers never see a partial file: temp file, then rename."""
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,51 @@
+from modules.chunking import context_windows, split_chunks
+from modules.prompts import PIISpan
+from modules.redactor import REDACTION_TOKEN, _merge_chunk_spans
+
+
+def _words(piece):
+    return len(piece.split())
+
+
+RESUME = (
+    "Jane Roe\n\nSUMMARY\nBackend engineer.  Mentored by Jane Roe's team lead.\r\n\n\n"
+    "EXPERIENCE\nAcme Corp 2015 - 2019\n\tBuilt billing with Jane Roe.\n"
+    "Contact: jane.roe@example.com\n\nEDUCATION\nBSc Computer Science\nReferee: Jane Roe   \n"
+)
+
+
+def test_chunks_cover_the_text_exactly():
+    bounds = split_chunks(RESUME, 6, _words)
+    assert len(bounds) > 2
+    assert "".join(RESUME[start:end] for start, end in bounds) == RESUME
+    assert all(prev_end == start for (_, prev_end), (start, _) in zip(bounds, bounds[1:]))
+
+
+def test_span_across_a_chunk_boundary_is_redacted_whole():
+    bounds = split_chunks(RESUME, 6, _words)
+    at = RESUME.index("Jane Roe's")
+    # The long summary line is cut at whitespace, between "Jane" and "Roe".
+    assert any(start < at + len("Jane") < end <= at + len("Jane Roe") for start, end in bounds)
+
+    windows = context_windows(RESUME, bounds, 8)
+    spans = [
+        [PIISpan(text="Jane Roe", category="name", occurrence=RESUME.count("Jane Roe", start, at) + 1)]
+        if start <= at and at + len("Jane Roe") <= end else []
+        for start, end in windows
+    ]
+    assert any(spans)
+
+    redacted = _merge_chunk_spans(RESUME, windows, spans)
+    assert redacted == RESUME[:at] + REDACTION_TOKEN + RESUME[at + len("Jane Roe"):]
+
+
+def test_window_occurrence_maps_to_the_full_text():
+    windows = context_windows(RESUME, split_chunks(RESUME, 6, _words), 0)
+    # The window holding "Built billing with Jane Roe" reports that mention as its first occurrence.
+    target = RESUME.index("Jane Roe", RESUME.index("Built billing"))
+    (window,) = [w for w in windows if w[0] <= target < w[1]]
+    spans = [[PIISpan(text="Jane Roe", category="name", occurrence=1)] if w == window else [] for w in windows]
+
+    redacted = _merge_chunk_spans(RESUME, windows, spans)
+    assert RESUME.count("Jane Roe", 0, window[0]) == 2
+    assert redacted == RESUME[:target] + REDACTION_TOKEN + RESUME[target + len("Jane Roe"):]
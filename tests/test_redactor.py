@@ -0,0 +1,63 @@
+import pytest
+
+from modules.prompts import PIISpan
+from modules.redactor import REDACTION_TOKEN, _offline_redaction, apply_redaction_spans, pre_redact
+
+
+def test_name_span_does_not_redact_longer_words():
+    text = "John worked with Johnny on Marketing; Mark reviewed it."
+    spans = [PIISpan(text="John", category="name", occurrence=0), PIISpan(text="Mark", category="name", occurrence=0)]
+    assert apply_redaction_spans(text, spans) == (
+        f"{REDACTION_TOKEN} worked with Johnny on Marketing; {REDACTION_TOKEN} reviewed it."
+    )
+
+
+def test_occurrence_counts_complete_matches_only():
+    text = "Johnny met John, then John left."
+    spans = [PIISpan(text="John", category="name", occurrence=2)]
+    assert apply_redaction_spans(text, spans) == f"Johnny met John, then {REDACTION_TOKEN} left."
+
+
+@pytest.mark.parametrize("text", [
+    "Software Engineer, 2019-2020-2021",
+    "Acme Corp (2015 - 2019)",
+    "Graduated 2021-03-15",
+    "ISBN 978-0-13-468599-1",
+    "ISBN 9780134685991",
+])
+def test_pre_redact_keeps_dates_and_isbns(text):
+    assert pre_redact(text) == (text, {"email": 0, "url": 0, "handle": 0, "phone": 0})
+
+
+@pytest.mark.parametrize("phone", ["+1 (415) 555-1234", "+61 412 345 678", "0412345678", "415.555.1234", "1-800-555-1234"])
+def test_pre_redact_masks_phone_numbers(phone):
+    text, counts = pre_redact(f"2019-2020 Call {phone}.")
+    assert text == f"2019-2020 Call {REDACTION_TOKEN}."
+    assert counts["phone"] == 1
+
+
+def test_prepass_off_sends_raw_text(monkeypatch):
+    monkeypatch.setenv("REDACTION_LLM_POLICY", "always")
+    monkeypatch.setenv("REDACTION_PREPASS", "off")
+    assert _offline_redaction("Call 0412 345 678") == ("Call 0412 345 678", True)
+
+
+def test_auto_policy_uses_llm_when_header_name_recurs(monkeypatch):
+    monkeypatch.setenv("REDACTION_LLM_POLICY", "auto")
+    text, needs_llm = _offline_redaction("Jane Doe\nSummary\nJane Doe is a data engineer.")
+    assert text == f"{REDACTION_TOKEN}\nSummary\nJane Doe is a data engineer."
+    assert needs_llm
+
+
+def test_auto_policy_uses_llm_for_referees(monkeypatch):
+    monkeypatch.setenv("REDACTION_LLM_POLICY", "auto")
+    assert _offline_redaction("Jane Doe\nSummary\nData engineer. Referee: John Smith, Acme.")[1]
+    assert _offline_redaction("Jane Doe\nSummary\nData engineer.\nReferences available on request.")[1]
+
+
+def test_auto_policy_skips_llm_when_only_header_holds_the_name(monkeypatch):
+    monkeypatch.setenv("REDACTION_LLM_POLICY", "auto")
+    assert _offline_redaction("Jane Doe\nSummary\nData engineer, 5 years of Python.") == (
+        f"{REDACTION_TOKEN}\nSummary\nData engineer, 5 years of Python.",
+        False,
+    )
@@ -0,0 +1,21 @@
+import numpy as np
+
+from modules.prompts import Categories, compute_rollups
+from modules.scoring import CATEGORY_NAMES, rescore
+
+
+def test_rescore_matches_compute_rollups():
+    rng = np.random.default_rng(0)
+    # One-decimal values, as the model returns them, hit rounding ties often.
+    scores = np.round(rng.uniform(0, 100, (20_000, len(CATEGORY_NAMES))), 1)
+    confidences = np.round(rng.uniform(0, 100, scores.shape), 1)
+
+    rollups = rescore(scores, confidences)
+    for i in range(len(scores)):
+        categories = Categories.model_validate({
+            name: {"score": scores[i, j], "confidence": confidences[i, j]} for j, name in enumerate(CATEGORY_NAMES)
+        })
+        expected = compute_rollups(categories)
+        assert rollups["overall_match_score"][i] == expected["overall_match_score"]
+        assert rollups["cumulative_confidence"][i] == expected["cumulative_confidence"]
+        assert rollups["fit_classification"][i] == expected["fit_classification"]
@@ -0,0 +1,62 @@
+import time
+
+from modules.workqueue import WorkQueue
+
+
+def _drain(queue, worker, status_for):
+    while (item := queue.claim(worker)) is not None:
+        queue.complete(item, worker, {"resume": item.resume, "position": item.position, "status": status_for(item)})
+        queue.mark_merged(item.name)
+
+
+def test_failed_items_are_requeued_and_unmerged(tmp_path):
+    queue = WorkQueue(tmp_path / "q")
+    assert queue.enqueue([("/r/a.txt", "/p/jd.txt"), ("/r/b.txt", "/p/jd.txt")]) == 2
+    _drain(queue, "w1", lambda item: "error" if item.resume == "/r/b.txt" else "ok")
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 2}
+
+    # A re-run coordinator re-queues the failure; enqueueing the same pairs adds nothing.
+    assert queue.retry_failed() == 1
+    assert queue.enqueue([("/r/a.txt", "/p/jd.txt"), ("/r/b.txt", "/p/jd.txt")]) == 0
+    assert queue.counts() == {"pending": 1, "leased": 0, "done": 1}
+    (retried,) = queue._names(queue.pending)
+    (finished,) = queue._names(queue.done)
+    assert queue.merged() == {finished}
+    assert retried != finished
+
+    _drain(queue, "w2", lambda item: "ok")
+    seen: set[str] = set()
+    assert [record["resume"] for _, record in queue.results(seen)] == ["/r/a.txt", "/r/b.txt"]
+    assert queue.retry_failed() == 0
+
+
+def test_expired_lease_is_reaped_back_to_pending(tmp_path):
+    queue = WorkQueue(tmp_path / "q", lease=0.2)
+    queue.enqueue([("/r/a.txt", "/p/jd.txt")])
+    queue.seal()
+    item = queue.claim("dead")
+    assert queue.claim("other") is None
+    assert queue.reap() == 0
+
+    time.sleep(0.3)
+    assert queue.reap() == 1
+    assert queue.heartbeat("dead", [item.name]) == {item.name}
+    assert not queue.finished()
+
+    again = queue.claim("other")
+    assert again.name == item.name
+    queue.complete(again, "other", {"status": "ok"})
+    assert queue.finished()
+
+
+def test_result_of_reaped_lease_is_kept(tmp_path):
+    queue = WorkQueue(tmp_path / "q", lease=0.2)
+    queue.enqueue([("/r/a.txt", "/p/jd.txt")])
+    item = queue.claim("slow")
+    time.sleep(0.3)
+    assert queue.reap() == 1
+
+    # The slow worker still finishes; the re-queued copy is then dropped rather than evaluated again.
+    queue.complete(item, "slow", {"status": "ok"})
+    assert queue.claim("other") is None
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 1}